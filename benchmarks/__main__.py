@@ -0,0 +1,151 @@
+"""Offline benchmarks of the integration hot paths.
+
+    python -m benchmarks [--quick]
+
+Every case reports the best wall time of a few rounds and the peak memory
+allocated by one round, measured with tracemalloc.
+"""
+import asyncio
+import inspect
+import json
+import sys
+import time
+import tracemalloc
+
+from homeassistant.core import Event
+
+from custom_components.tplink_enterprise_router import device_tracker, stream_decode
+from custom_components.tplink_enterprise_router.client import TPLinkEnterpriseRouterClient
+from custom_components.tplink_enterprise_router.sensor import SENSOR_TYPES
+from custom_components.tplink_enterprise_router.syslog_tracker import SyslogTracker
+
+from .fakes import NullStore, build_coordinator, build_entry, build_hass
+from .payloads import build_status_json, build_syslog_lines
+
+SIZES = ((10, 1), (100, 5), (1000, 50), (5000, 100), (20000, 500))
+QUICK_SIZES = ((10, 1), (1000, 50))
+SYSLOG_LINES = 5000
+
+
+def measure(func, rounds: int = 3) -> tuple[float, int]:
+    """ Return best seconds and peak bytes of func, which may be a coroutine function """
+    loop = asyncio.new_event_loop()
+
+    def run():
+        result = func()
+        if inspect.isawaitable(result):
+            loop.run_until_complete(result)
+
+    try:
+        best = float("inf")
+        for _ in range(rounds):
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+
+        tracemalloc.start()
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        loop.close()
+
+    return best, peak
+
+
+class _Reader:
+    """ Feeds a body to stream_decode like aiohttp's StreamReader """
+
+    def __init__(self, body: bytes, chunk_size: int = 65536):
+        self.body = body
+        self.offset = 0
+        self.chunk_size = chunk_size
+
+    async def read(self, size: int = -1) -> bytes:
+        size = self.chunk_size if size < 0 else min(size, self.chunk_size)
+        chunk = self.body[self.offset:self.offset + size]
+        self.offset += len(chunk)
+        return chunk
+
+
+def bench_client(host_count: int, ap_count: int) -> dict:
+    raw = build_status_json(host_count, ap_count)
+    body = json.dumps(raw).encode()
+    client = TPLinkEnterpriseRouterClient.__new__(TPLinkEnterpriseRouterClient)
+
+    results = {
+        "json decode": measure(lambda: json.loads(body)),
+        "process_data": measure(lambda: client.process_data(raw)),
+    }
+
+    if stream_decode.is_available():
+        results["stream decode"] = measure(lambda: stream_decode.async_decode_status(_Reader(body)))
+
+    return results
+
+
+def bench_entities(host_count: int, ap_count: int) -> dict:
+    client = TPLinkEnterpriseRouterClient.__new__(TPLinkEnterpriseRouterClient)
+    status = client.process_data(build_status_json(host_count, ap_count))
+    changed = client.process_data(build_status_json(host_count, ap_count, seed=1))
+    entry = build_entry(enable_host_entity=True)
+    coordinator = build_coordinator(entry, status)
+    hass = build_hass(entry, coordinator)
+
+    def build_attributes(limit=None):
+        for description in SENSOR_TYPES:
+            description.value(status)
+            json.dumps(description.attrs(status, limit), default=str)
+
+    """ Persisting is the Store's business, not ours """
+    device_tracker.Store = NullStore
+    tracker = device_tracker.DeviceTracker(hass, entry, coordinator, lambda entities, update: None)
+
+    added = changed['hosts_dict'].keys() - status['hosts_dict'].keys()
+
+    async def update_hosts():
+        await tracker.update_hosts(status['hosts_dict'])
+        await tracker.update_hosts(changed['hosts_dict'], added)
+
+    return {
+        "sensor attributes (full)": measure(build_attributes),
+        "sensor attributes (top_n 20)": measure(lambda: build_attributes(20)),
+        "sensor attributes (summary)": measure(lambda: build_attributes(0)),
+        "DeviceTracker.update_hosts x2": measure(update_hosts),
+    }
+
+
+def bench_syslog(host_count: int, ap_count: int) -> dict:
+    entry = build_entry()
+    coordinator = build_coordinator(entry, {"local_ip": "192.168.0.100"})
+    hass = build_hass(entry, coordinator)
+    client = TPLinkEnterpriseRouterClient.__new__(TPLinkEnterpriseRouterClient)
+    client.host = entry.data["host"]
+    events = [
+        Event("syslog_receiver_message", {"message": message, "severity": severity, "source_ip": "192.168.0.1"})
+        for message, severity in build_syslog_lines(SYSLOG_LINES, host_count, ap_count)
+    ]
+
+    async def handle():
+        tracker = SyslogTracker(hass, entry, client)
+        for matcher in tracker.matchers:
+            matcher.translations = {}
+
+        for event in events:
+            await tracker.handle(event)
+
+    return {f"SyslogTracker.handle x{SYSLOG_LINES}": measure(handle)}
+
+
+def main() -> None:
+    sizes = QUICK_SIZES if "--quick" in sys.argv else SIZES
+
+    print(f"{'case':<32} {'hosts':>6} {'aps':>4} {'ms':>10} {'peak KiB':>10}")
+    for host_count, ap_count in sizes:
+        for bench in (bench_client, bench_entities, bench_syslog):
+            for name, (elapsed, peak) in bench(host_count, ap_count).items():
+                print(f"{name:<32} {host_count:>6} {ap_count:>4} {elapsed * 1000:>10.2f} {peak / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""Stand-in TP-Link enterprise router for load and fault-injection testing.
+
+    python -m benchmarks.fake_router --hosts 3000 --aps 50 --token-ttl 60 --timeout-rate 0.01
+
+Point the integration (or benchmarks.load_test) at http://127.0.0.1:8080,
+any username and password "admin" / "admin" are accepted by default.
+GET /stats returns request counters.
+"""
+import argparse
+import asyncio
+import random
+import secrets
+import time
+from collections import Counter
+from datetime import datetime
+
+from aiohttp import web
+
+from .payloads import build_status_json, build_syslog_lines
+
+ERROR_CODE_TOKEN_EXPIRED = -40401
+ERROR_CODE_LOGIN_FAILED = -40210
+
+
+class FakeRouter:
+    def __init__(
+            self,
+            host_count: int = 100,
+            ap_count: int = 5,
+            username: str = "admin",
+            password: str = "admin",
+            latency: float = 0.0,
+            jitter: float = 0.0,
+            token_ttl: float = 0,
+            timeout_rate: float = 0.0,
+            timeout: float = 30.0,
+            malformed_rate: float = 0.0,
+            log_rate: float = 1.0,
+            reboot_time: float = 30.0,
+            seed: int = 0,
+    ):
+        self.username = username
+        self.password = password
+        self.latency = latency
+        self.jitter = jitter
+        self.token_ttl = token_ttl
+        self.timeout_rate = timeout_rate
+        self.timeout = timeout
+        self.malformed_rate = malformed_rate
+        self.log_rate = log_rate
+        self.reboot_time = reboot_time
+        self.random = random.Random(seed)
+
+        self.status = build_status_json(host_count, ap_count, seed)
+        self.host_count = host_count
+        self.ap_count = ap_count
+        self.tokens: dict[str, float] = {}
+        self.stats = Counter()
+        self.logs: list[str] = []
+        self._log_clock = time.monotonic()
+        self._rebooting_until = 0.0
+
+        self.app = web.Application()
+        self.app.router.add_post("/", self.handle_login)
+        self.app.router.add_post("/stok={token}/ds", self.handle_ds)
+        self.app.router.add_get("/stats", self.handle_stats)
+
+    async def _inject_faults(self) -> web.Response | None:
+        if time.monotonic() < self._rebooting_until:
+            self.stats["refused_rebooting"] += 1
+            raise web.HTTPServiceUnavailable()
+
+        delay = self.latency + self.random.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+
+        if self.random.random() < self.timeout_rate:
+            self.stats["timeouts"] += 1
+            await asyncio.sleep(self.timeout)
+
+        if self.random.random() < self.malformed_rate:
+            self.stats["malformed"] += 1
+            return web.Response(text='{"error_code": 0, "host_management": {"host_info": [', content_type="application/json")
+
+        return None
+
+    async def handle_login(self, request: web.Request) -> web.Response:
+        self.stats["requests"] += 1
+        if (fault := await self._inject_faults()) is not None:
+            return fault
+
+        payload = await request.json()
+        login = payload.get("login", {})
+        if login.get("username") != self.username or login.get("password") != self.password:
+            return web.json_response({"error_code": ERROR_CODE_LOGIN_FAILED})
+
+        self.stats["logins"] += 1
+        token = secrets.token_hex(16)
+        self.tokens[token] = time.monotonic()
+
+        return web.json_response({"error_code": 0, "stok": token})
+
+    async def handle_ds(self, request: web.Request) -> web.Response:
+        self.stats["requests"] += 1
+        if (fault := await self._inject_faults()) is not None:
+            return fault
+
+        token = request.match_info["token"]
+        issued_at = self.tokens.get(token)
+        if issued_at is None or (self.token_ttl and time.monotonic() - issued_at > self.token_ttl):
+            self.tokens.pop(token, None)
+            self.stats["token_expired"] += 1
+            return web.json_response({"error_code": ERROR_CODE_TOKEN_EXPIRED})
+
+        payload = await request.json()
+        method = payload.pop("method", None)
+        self.stats[f"method_{method}"] += 1
+
+        if method == "get":
+            return web.json_response(self._get(payload))
+        if method == "do":
+            return web.json_response(self._do(payload, token))
+        if method == "set":
+            return web.json_response(self._set(payload))
+
+        return web.json_response({"error_code": -40101})
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(dict(self.stats))
+
+    def _get(self, payload: dict) -> dict:
+        response = {"error_code": 0}
+
+        for section, query in payload.items():
+            self.stats[f"get_{section}"] += 1
+            data = self.status.get(section)
+            if data is None:
+                continue
+
+            if section == "system":
+                response[section] = {name: data[name] for name in query.get("name", []) if name in data}
+            elif section == "apmng_set":
+                """ Honour the requested row window """
+                para = query.get("para", {})
+                response[section] = {"ap_list": data["ap_list"][para.get("start", 0):para.get("end", 499) + 1]}
+            else:
+                response[section] = data
+
+        return response
+
+    def _do(self, payload: dict, token: str) -> dict:
+        system = payload.get("system", {})
+
+        if "read_logs" in system:
+            self.stats["read_logs"] += 1
+            return self._read_logs(system["read_logs"])
+
+        if "logout" in system:
+            self.stats["logouts"] += 1
+            self.tokens.pop(token, None)
+        elif "reboot" in system:
+            self.stats["reboots"] += 1
+            self.tokens.clear()
+            self._rebooting_until = time.monotonic() + self.reboot_time
+        elif "apmng_status" in payload:
+            self.stats["ap_reboots"] += 1
+
+        return {"error_code": 0}
+
+    def _set(self, payload: dict) -> dict:
+        self.stats["writes"] += 1
+        wserv = payload.get("apmng_wserv")
+
+        if wserv is not None:
+            """ Filters may target several SSIDs in one request """
+            serv_ids = {item.get("serv_id") for item in wserv.get("filter", [])}
+            for row in self.status["apmng_wserv"]["wlan_serv"]:
+                ssid = next(iter(row.values()))
+                if ssid["serv_id"] in serv_ids:
+                    ssid.update(wserv.get("para", {}))
+
+        return {"error_code": 0}
+
+    def _read_logs(self, query: dict) -> dict:
+        """ Grow the log by log_rate lines per second, newest first """
+        now = time.monotonic()
+        new_count = int((now - self._log_clock) * self.log_rate)
+
+        if new_count:
+            self._log_clock = now
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            for message, severity in build_syslog_lines(new_count, self.host_count, self.ap_count, self.random.random()):
+                """ Always in the router format """
+                body = message.split("]", 1)[1] if message.startswith("<") else message.split("> : ", 1)[1]
+                scope = "WSTATION" if severity == 7 else "DHCPS"
+                self.logs.insert(0, f"<{severity}>{timestamp}[{scope}]{body}")
+            del self.logs[1000:]
+
+        page = int(query.get("page", 1))
+        count = int(query.get("num_per_page", 50))
+        window = self.logs[(page - 1) * count:page * count]
+
+        return {
+            "error_code": 0,
+            "syslog": [{f"syslog_{index + 1}": line} for index, line in enumerate(window)],
+            "count": {"syslog": len(self.logs)},
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--hosts", type=int, default=100)
+    parser.add_argument("--aps", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra latency in seconds")
+    parser.add_argument("--token-ttl", type=float, default=0, help="seconds before stok expires, 0 never")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="share of requests that hang")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="share of truncated json bodies")
+    parser.add_argument("--log-rate", type=float, default=1.0, help="syslog lines per second")
+    parser.add_argument("--reboot-time", type=float, default=30.0, help="seconds unreachable after reboot")
+    args = parser.parse_args()
+
+    router = FakeRouter(
+        host_count=args.hosts,
+        ap_count=args.aps,
+        latency=args.latency,
+        jitter=args.jitter,
+        token_ttl=args.token_ttl,
+        timeout_rate=args.timeout_rate,
+        malformed_rate=args.malformed_rate,
+        log_rate=args.log_rate,
+        reboot_time=args.reboot_time,
+    )
+    web.run_app(router.app, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
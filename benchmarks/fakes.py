@@ -0,0 +1,57 @@
+"""Just enough of Home Assistant for the hot paths to run without an instance."""
+from types import SimpleNamespace
+
+from custom_components.tplink_enterprise_router.const import DOMAIN
+from custom_components.tplink_enterprise_router.host_diff import HostChangeSet
+
+
+class FakeBus:
+    def __init__(self):
+        self.fired = 0
+
+    def fire(self, event_type, event_data=None) -> None:
+        self.fired += 1
+
+    def async_fire(self, event_type, event_data=None) -> None:
+        self.fired += 1
+
+
+class NullStore:
+    def __init__(self, *args, **kwargs):
+        self.saves = 0
+
+    async def async_load(self):
+        return None
+
+    async def async_save(self, data) -> None:
+        self.saves += 1
+
+    def async_delay_save(self, data_func, delay=0) -> None:
+        self.saves += 1
+
+
+def build_entry(**data):
+    return SimpleNamespace(
+        entry_id="benchmark",
+        data={"host": "http://192.168.0.1", "unstable_check_count": 5, "unstable_check_time": 120, **data},
+        options={},
+    )
+
+
+def build_coordinator(entry, status: dict):
+    return SimpleNamespace(
+        entry=entry,
+        status=status,
+        unique_id="benchmark",
+        device_info=None,
+        host_changes=HostChangeSet(),
+        last_update_success=True,
+    )
+
+
+def build_hass(entry, coordinator):
+    return SimpleNamespace(
+        bus=FakeBus(),
+        data={DOMAIN: {entry.entry_id: coordinator}},
+        config=SimpleNamespace(language="en"),
+    )
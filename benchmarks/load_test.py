@@ -0,0 +1,107 @@
+"""Drive TPLinkEnterpriseRouterClient against the fake router.
+
+    python -m benchmarks.load_test --pollers 20 --duration 30 --token-ttl 5
+
+Starts benchmarks.fake_router in process unless --url is given, then runs
+concurrent status pollers, syslog pollers and SSID writers and reports
+latency percentiles, errors and how many logins the router saw.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+
+from aiohttp import ClientSession, web
+
+from custom_components.tplink_enterprise_router.client import TPLinkEnterpriseRouterClient
+
+from .fake_router import FakeRouter
+
+
+async def _worker(name: str, operation, deadline: float, interval: float, latencies: dict, errors: Counter):
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        try:
+            await operation()
+            latencies.setdefault(name, []).append(time.perf_counter() - start)
+        except Exception as e:
+            errors[f"{name}: {type(e).__name__}"] += 1
+
+        await asyncio.sleep(interval)
+
+
+def _percentile(values: list, percent: int) -> float:
+    return statistics.quantiles(values, n=100)[percent - 1] if len(values) > 1 else values[0]
+
+
+async def run(args) -> None:
+    runner = None
+    url = args.url
+
+    if url is None:
+        router = FakeRouter(
+            host_count=args.hosts,
+            ap_count=args.aps,
+            latency=args.latency,
+            token_ttl=args.token_ttl,
+            timeout_rate=args.timeout_rate,
+            malformed_rate=args.malformed_rate,
+        )
+        runner = web.AppRunner(router.app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", args.port).start()
+        url = f"http://127.0.0.1:{args.port}"
+
+    latencies: dict[str, list] = {}
+    errors = Counter()
+    deadline = time.monotonic() + args.duration
+
+    async with ClientSession() as session:
+        """ One client shared by every worker, like one config entry """
+        client = TPLinkEnterpriseRouterClient(None, url, "admin", "admin", session=session)
+        workers = [
+            _worker("get_status", client.get_status, deadline, args.interval, latencies, errors)
+            for _ in range(args.pollers)
+        ]
+        workers.append(_worker("get_syslog", lambda: client.get_syslog(50), deadline, args.interval, latencies, errors))
+        workers.append(_worker(
+            "set_ssid", lambda: client.set_ssid("1", {"enable": "on"}), deadline, args.interval * 5, latencies, errors
+        ))
+        await asyncio.gather(*workers)
+
+        async with session.get(f"{url}/stats") as response:
+            stats = await response.json()
+
+    if runner is not None:
+        await runner.cleanup()
+
+    print(f"{'operation':<12} {'count':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, values in latencies.items():
+        print(f"{name:<12} {len(values):>7} {_percentile(values, 50) * 1000:>8.1f} "
+              f"{_percentile(values, 95) * 1000:>8.1f} {_percentile(values, 99) * 1000:>8.1f}")
+
+    print(f"client logins: {client.tokens.login_count}")
+    print(f"router stats: {stats}")
+    for error, count in errors.most_common():
+        print(f"error {error}: {count}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="existing router or fake router, default starts one in process")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--hosts", type=int, default=1000)
+    parser.add_argument("--aps", type=int, default=50)
+    parser.add_argument("--pollers", type=int, default=10)
+    parser.add_argument("--interval", type=float, default=0.5)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--token-ttl", type=float, default=0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
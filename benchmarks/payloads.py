@@ -0,0 +1,128 @@
+"""Synthetic router payloads in the shape returned by the router API."""
+import random
+from datetime import datetime, timedelta
+
+SSIDS = ("Office", "Office-5G", "Guest", "IoT")
+FREQUENCIES = ("2.4GHz", "5GHz")
+
+
+def build_status_json(host_count: int, ap_count: int, seed: int = 0) -> dict:
+    """ Raw json of a full get_status request """
+    rand = random.Random(seed)
+    hosts = []
+
+    for index in range(host_count):
+        host = {
+            "mac": "%02X-%02X-%02X-%02X-%02X-%02X" % (
+                0x02, rand.randrange(256), index >> 16 & 0xFF, index >> 8 & 0xFF, index & 0xFF, rand.randrange(256)
+            ),
+            "ip": f"10.{index >> 16 & 0xFF}.{index >> 8 & 0xFF}.{index & 0xFF}",
+            "hostname": rand.choice(("iPhone", "Galaxy%20S24", "MacBook-Pro", "anonymous", "---")),
+            "connect_date": "2024-05-01%2008%3A00%3A00",
+            "connect_time": str(rand.randrange(86400)),
+            "is_cur_host": 1 if index == 0 else 0,
+            "interface": "LAN1",
+            "up_speed": str(rand.randrange(10000)),
+            "down_speed": str(rand.randrange(100000)),
+            "host_save": "off",
+            "vlan_id": "0",
+        }
+
+        if rand.random() < 0.8:
+            host.update({
+                "type": "wireless",
+                "ssid": rand.choice(SSIDS),
+                "freq_name": rand.choice(FREQUENCIES),
+                "ap_name": f"AP-{rand.randrange(ap_count)}",
+                "rssi": str(-rand.randrange(30, 90)),
+            })
+        else:
+            host["type"] = "wired"
+
+        hosts.append({f"host_info_{index + 1}": host})
+
+    ap_list = [
+        {f"ap_list_{index + 1}": {
+            "entry_name": f"AP-{index}",
+            "entry_id": str(index + 1),
+            "mac": "00-5F-67-00-%02X-%02X" % (index >> 8 & 0xFF, index & 0xFF),
+            "status": "2" if rand.random() < 0.95 else "1",
+            "led": "on",
+            "model": "TL-AP1202GC-PoE",
+            "ip": f"192.168.{index >> 8 & 0xFF}.{index & 0xFF}",
+        }}
+        for index in range(ap_count)
+    ]
+
+    wlan_serv = [
+        {f"wlan_serv_{index + 1}": {"ssid": ssid, "enable": "on", "serv_id": str(index + 1), "network_type": "1"}}
+        for index, ssid in enumerate(SSIDS)
+    ]
+
+    return {
+        "error_code": 0,
+        "host_management": {"host_info": hosts, "host_count_info": {}},
+        "system": {
+            "cpu_usage": {"core1": "12", "core2": "8"},
+            "mem_usage": {"mem": "41"},
+            "device_info": {
+                "model": "TL-R479GPE-AC",
+                "mac": "00-5F-67-AA-BB-CC",
+                "firmware_version": "1.0.0%20Build%2020240101",
+                "hardware_version": "1.0",
+            },
+        },
+        "online_check": {
+            "state": {"state_1": {"state": "1", "name": "WAN1"}},
+            "count": {"state": 1},
+        },
+        "apmng_set": {"ap_list": ap_list},
+        "apmng_wserv": {"wlan_serv": wlan_serv},
+    }
+
+
+def _mac(rand: random.Random, host_count: int) -> str:
+    index = rand.randrange(host_count)
+    return "02-00-%02X-%02X-%02X-00" % (index >> 16 & 0xFF, index >> 8 & 0xFF, index & 0xFF)
+
+
+def _wireless_body(rand: random.Random, host_count: int, ap_count: int) -> str:
+    mac = _mac(rand, host_count)
+    ap_name = f"AP-{rand.randrange(ap_count)}"
+    ssid = f"{rand.choice(SSIDS)}({rand.choice(FREQUENCIES)})"
+    kind = rand.random()
+
+    if kind < 0.4:
+        return f"客户端 {mac} 从AP {ap_name} 断开连接."
+    if kind < 0.8:
+        return f"客户端 {mac} {ap_name}(IP 192.168.0.{rand.randrange(254)};MAC 00-5F-67-00-00-01) {ssid}. 成功连接到AP"
+
+    return f"客户端 {mac} {ap_name}的 {ssid} 成功漫游到AP AP-{rand.randrange(ap_count)}的 {ssid}"
+
+
+def build_syslog_lines(count: int, host_count: int, ap_count: int, seed: int = 0) -> list[tuple[str, int]]:
+    """ (message, severity) pairs in both formats handled by SyslogTracker.get_event_data """
+    rand = random.Random(seed)
+    start = datetime(2024, 5, 1, 8)
+    lines = []
+
+    for index in range(count):
+        timestamp = (start + timedelta(seconds=index)).strftime("%Y-%m-%d %H:%M:%S")
+
+        if rand.random() < 0.9:
+            body = _wireless_body(rand, host_count, ap_count)
+            severity = 7
+            scope = "WSTATION"
+        else:
+            body = f"DHCP服务器 {_mac(rand, host_count)} 分配了IP地址10.0.{rand.randrange(256)}.{rand.randrange(256)}"
+            severity = 5
+            scope = "DHCPS"
+
+        if index % 2 == 0:
+            """ Router log format, as returned by read_logs """
+            lines.append((f"<{severity}>{timestamp}[{scope}]{body}", severity))
+        else:
+            """ Syslog receiver format """
+            lines.append((f"192.168.0.1 TL-R479GPE-AC {scope.lower()}: notice - {timestamp} <{severity}> : {body}", severity))
+
+    return lines
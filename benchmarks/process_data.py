@@ -0,0 +1,36 @@
+"""Time TPLinkEnterpriseRouterClient.process_data against payload size.
+
+    python -m benchmarks.process_data
+"""
+import time
+
+from custom_components.tplink_enterprise_router.client import TPLinkEnterpriseRouterClient
+
+from .payloads import build_status_json
+
+SIZES = ((100, 5), (1000, 50), (5000, 100), (10000, 250), (20000, 500))
+
+
+def measure(host_count: int, ap_count: int, rounds: int = 5) -> float:
+    json = build_status_json(host_count, ap_count)
+    client = TPLinkEnterpriseRouterClient.__new__(TPLinkEnterpriseRouterClient)
+    best = float("inf")
+
+    for _ in range(rounds):
+        start = time.perf_counter()
+        client.process_data(json)
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def main() -> None:
+    print(f"{'hosts':>7} {'aps':>5} {'ms':>9} {'us/host':>9}")
+
+    for host_count, ap_count in SIZES:
+        elapsed = measure(host_count, ap_count)
+        print(f"{host_count:>7} {ap_count:>5} {elapsed * 1000:>9.2f} {elapsed * 1e6 / host_count:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
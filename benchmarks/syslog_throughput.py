@@ -0,0 +1,99 @@
+"""Syslog lines per second through SyslogTracker.
+
+    python -m benchmarks.syslog_throughput --lines 20000 --hosts 1000 --aps 50 --storm
+
+Compares the matcher loop, where every EventMatcher checks and splits the
+message on its own, with the dispatch SyslogTracker.handle uses, which picks
+the matcher once and splits once. The last row is handle end to end, with
+tracking and unstable client checks. --storm replays only roam lines, like an
+AP-wide roam storm.
+"""
+import argparse
+import asyncio
+import time
+
+from homeassistant.core import Event
+
+from custom_components.tplink_enterprise_router.client import TPLinkEnterpriseRouterClient
+from custom_components.tplink_enterprise_router.syslog_tracker import SyslogTracker
+
+from .fakes import build_coordinator, build_entry, build_hass
+from .payloads import build_syslog_lines
+
+
+def build_tracker() -> SyslogTracker:
+    entry = build_entry()
+    coordinator = build_coordinator(entry, {"local_ip": "192.168.0.100"})
+    client = TPLinkEnterpriseRouterClient.__new__(TPLinkEnterpriseRouterClient)
+    client.host = entry.data["host"]
+    tracker = SyslogTracker(build_hass(entry, coordinator), entry, client)
+
+    for matcher in tracker.matchers:
+        matcher.translations = {}
+
+    return tracker
+
+
+def build_events(count: int, host_count: int, ap_count: int, storm: bool) -> list[Event]:
+    lines = build_syslog_lines(count * 5 if storm else count, host_count, ap_count)
+    if storm:
+        lines = [line for line in lines if "成功漫游到AP" in line[0]][:count]
+
+    return [
+        Event("syslog_receiver_message", {"message": message, "severity": severity, "source_ip": "192.168.0.1"})
+        for message, severity in lines
+    ]
+
+
+async def matcher_loop(tracker: SyslogTracker, events: list[Event]) -> None:
+    for event in events:
+        event_data = SyslogTracker.get_event_data(event)
+        for matcher in tracker.matchers:
+            if await matcher.process(event_data):
+                break
+
+
+async def dispatch(tracker: SyslogTracker, events: list[Event]) -> None:
+    for event in events:
+        event_data = SyslogTracker.get_event_data(event)
+        matcher = tracker.find_matcher(event_data['message'])
+        if matcher is not None:
+            await matcher.process_matched(event_data, event_data['message'].split(" "))
+
+
+async def handle(tracker: SyslogTracker, events: list[Event]) -> None:
+    for event in events:
+        await tracker.handle(event)
+
+
+def lines_per_second(func, events: list[Event], rounds: int) -> float:
+    best = float("inf")
+
+    for _ in range(rounds):
+        """ Fresh tracker, tracking state would otherwise drop the replayed lines """
+        tracker = build_tracker()
+        start = time.perf_counter()
+        asyncio.run(func(tracker, events))
+        best = min(best, time.perf_counter() - start)
+
+    return len(events) / best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=20000)
+    parser.add_argument("--hosts", type=int, default=1000)
+    parser.add_argument("--aps", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--storm", action="store_true", help="roam lines only")
+    args = parser.parse_args()
+
+    events = build_events(args.lines, args.hosts, args.aps, args.storm)
+
+    print(f"{'path':<24} {'lines':>7} {'lines/s':>12}")
+    for name, func in (("matcher loop", matcher_loop), ("dispatch", dispatch), ("SyslogTracker.handle", handle)):
+        print(f"{name:<24} {len(events):>7} {lines_per_second(func, events, args.rounds):>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,14 @@ from homeassistant.core import HomeAssistant
 
 from .const import (DOMAIN, PLATFORMS)
 from .coordinator import TPLinkEnterpriseRouterCoordinator
+from .polling import get_domain_scheduler
+from .services import async_register_services
+from .syslog_listener import (
+    async_get_syslog_listener,
+    get_syslog_bus_router,
+    release_syslog_bus_router,
+    release_syslog_listener,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -15,23 +23,51 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         _LOGGER.warning("Integration already loaded, skipping reload")
         return True
 
-    """ Register coordinator """
+    """ Register coordinator, warm start from the last snapshot when there is one """
     _coordinator = TPLinkEnterpriseRouterCoordinator(hass, entry)
-    await _coordinator.async_config_entry_first_refresh()
+    restored = await _coordinator.async_restore_snapshot()
+    if not restored:
+        await _coordinator.async_config_entry_first_refresh()
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = _coordinator
+    entry.async_on_unload(_coordinator.syslog_tracker.emitter.close)
+    async_register_services(hass)
+
+    if entry.data.get("enable_syslog_listener", False) or entry.data.get("enable_syslog_notify_event", False):
+        await _coordinator.syslog_tracker.async_resolve_source_ip()
+
+    """ Built-in syslog receiver, routed by the router's address, bound before any platform is set up """
+    if entry.data.get("enable_syslog_listener", False):
+        port = entry.data.get("syslog_listen_port", 5140)
+        try:
+            listener = await async_get_syslog_listener(hass, port)
+        except OSError as e:
+            _LOGGER.error("Fail to listen for syslog on UDP port %s: %s", port, e)
+        else:
+            tracker = _coordinator.syslog_tracker
+            tracker.listener = listener
+            listener.add_route(tracker.source_ip, tracker)
+
+            entry.async_on_unload(lambda: release_syslog_listener(hass, listener, tracker))
 
     """ Forward setup """
     await hass.async_create_task(
         hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     )
 
-    """ Syslog event handler """
-    if entry.data.get("enable_syslog_notify_event", False):
-        remove_listener = hass.bus.async_listen(
-            entry.data.get("syslog_event", "syslog_receiver_message"), _coordinator.syslog_tracker.handle,
+    """ Refresh without blocking startup """
+    if restored:
+        hass.async_create_background_task(
+            _coordinator.async_refresh(), f"{DOMAIN}_{entry.entry_id}_first_refresh"
         )
 
-        entry.async_on_unload(remove_listener)
+    """ Syslog event handler, one listener per event name routes lines by source IP """
+    if entry.data.get("enable_syslog_notify_event", False):
+        tracker = _coordinator.syslog_tracker
+        bus_router = get_syslog_bus_router(hass, entry.data.get("syslog_event", "syslog_receiver_message"))
+        tracker.bus_router = bus_router
+        bus_router.add_route(tracker.source_ip, tracker)
+
+        entry.async_on_unload(lambda: release_syslog_bus_router(hass, bus_router, tracker))
 
     return True
 
@@ -44,5 +80,6 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """ Unload the data """
     if unload_ok:
         hass.data[DOMAIN].pop(entry.entry_id)
+        get_domain_scheduler(hass).unregister(entry.entry_id)
 
     return True
\ No newline at end of file
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import random
+import time
+
+from homeassistant.exceptions import IntegrationError
+
+from .const import BREAKER_BASE_DELAY, BREAKER_FAILURE_THRESHOLD, BREAKER_MAX_DELAY
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(IntegrationError):
+    """Raised without touching the network while the router is considered down."""
+
+
+class CircuitBreaker:
+    """Stop talking to a router after repeated failures and probe it with one request at a time."""
+
+    def __init__(
+            self,
+            host: str,
+            failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+            base_delay: float = BREAKER_BASE_DELAY,
+            max_delay: float = BREAKER_MAX_DELAY,
+    ):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.open_until = 0.0
+        self._probing = False
+
+    def before_request(self) -> None:
+        if self.state == STATE_CLOSED:
+            return
+
+        if self.state == STATE_OPEN:
+            if time.monotonic() < self.open_until:
+                raise CircuitOpenError(f"Router {self.host} is unavailable, retrying in "
+                                       f"{self.open_until - time.monotonic():.0f}s")
+            self.state = STATE_HALF_OPEN
+
+        """ Half open, only one probe in flight """
+        if self._probing:
+            raise CircuitOpenError(f"Router {self.host} is being probed")
+        self._probing = True
+
+    def release_probe(self) -> None:
+        """ The probe was cancelled before it could tell anything """
+        self._probing = False
+
+    def record_success(self) -> None:
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.trips = 0
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self._probing = False
+        self.failures += 1
+
+        if self.state == STATE_HALF_OPEN or self.failures >= self.failure_threshold:
+            self.trip()
+
+    def trip(self, duration: float | None = None) -> None:
+        """ Open the circuit, by default for a jittered exponential backoff """
+        if duration is None:
+            delay = min(self.max_delay, self.base_delay * 2 ** self.trips)
+            duration = random.uniform(delay / 2, delay)
+
+        self.trips += 1
+        self.state = STATE_OPEN
+        self.open_until = time.monotonic() + duration
+        self._probing = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.state != STATE_CLOSED
@@ -1,214 +1,317 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
 import logging
+import random
+import time
+from collections.abc import Awaitable, Callable
+from json import loads as json_loads
 from urllib.parse import unquote
 from aiohttp import ClientTimeout
 
 from homeassistant.exceptions import HomeAssistantError, IntegrationError, ConfigEntryAuthFailed
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
+from . import stream_decode
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .const import (
+    AP_KEYS,
+    AUTH_RETRY_LIMIT,
+    ERROR_CODE_TOKEN_EXPIRED,
+    READ_RETRY_DELAY,
+    READ_RETRY_LIMIT,
+    REBOOT_GRACE_PERIOD,
+    REQUEST_TIMEOUTS,
+    SSID_KEYS,
+    STREAM_DECODE_MIN_BYTES,
+)
+from .host_record import HostRecord
+from .metrics import CountingReader, Metrics
+
 _LOGGER = logging.getLogger(__name__)
 
 
+""" Sections of the status query, polled together or at separate rates """
+STATUS_GROUPS = {
+    "system": {
+        "system": {"name": ["cpu_usage", "mem_usage"]},
+        "online_check": {"table": "state", "name": "state"},
+    },
+    "hosts": {
+        "host_management": {"name": "host_count_info", "table": "host_info"},
+    },
+    "aps": {
+        "apmng_set": {
+            "table": "ap_list",
+            "filter": [
+                {"group_id": "0", "ap_role": "re_all"}, {"group_id": "0"}
+            ],
+            "para": {"start": 0, "end": 499}
+        },
+    },
+    "ssids": {
+        "apmng_wserv": {
+            "table": "wlan_serv", "filter": {"network_type": ["1", "2", "3"]},
+            "para": {"start": 0, "end": 9}
+        },
+    },
+    "device_info": {
+        "system": {"name": ["device_info"]},
+    },
+}
+
+
+def build_status_payload(groups) -> dict:
+    payload = {"method": "get"}
+
+    for group in groups:
+        for section, query in STATUS_GROUPS[group].items():
+            if section in payload and "name" in query:
+                """ Sections sharing a module are merged by name """
+                payload[section] = {**payload[section], "name": payload[section]["name"] + query["name"]}
+            else:
+                payload[section] = query
+
+    return payload
+
+
+class TokenManager:
+    """Share one stok between every request and serialize re-authentication."""
+
+    def __init__(self, authenticate: Callable[[], Awaitable[str]], max_age: int = 0):
+        self._authenticate = authenticate
+        self._lock = asyncio.Lock()
+        self._max_age = max_age
+        self._issued_at = 0.0
+        self.token = None
+        self.login_count = 0
+
+    @property
+    def expired(self) -> bool:
+        if self.token is None:
+            return True
+
+        return self._max_age > 0 and time.monotonic() - self._issued_at >= self._max_age
+
+    async def async_get_token(self) -> str:
+        if not self.expired:
+            return self.token
+
+        """ Only one login in flight, other callers reuse its token """
+        async with self._lock:
+            if not self.expired:
+                return self.token
+
+            self.token = await self._authenticate()
+            self._issued_at = time.monotonic()
+            self.login_count += 1
+
+            return self.token
+
+    def invalidate(self, token: str | None = None) -> None:
+        """ Drop the token unless another caller already replaced it """
+        if token is None or token == self.token:
+            self.token = None
+
+
 class TPLinkEnterpriseRouterClient:
-    def __init__(self, hass, host, username, password):
+    def __init__(self, hass, host, username, password, token_max_age: int = 0, session=None, limiter=None,
+                 breaker=None):
         self.host = host
         self.username = username
         self.password = password
-        self.token = None
-        self._session = async_get_clientsession(hass)
+        self.tokens = TokenManager(self._login, token_max_age)
+        """ Shared by entries of the same host too """
+        self.breaker = breaker or CircuitBreaker(host)
+        self.metrics = Metrics()
+        """ Caps concurrent requests to the router, shared by entries of the same host """
+        self.limiter = limiter or contextlib.nullcontext()
+        self._session = session or async_get_clientsession(hass)
+
+    @property
+    def token(self):
+        return self.tokens.token
 
     async def authenticate(self) -> None:
+        self.tokens.invalidate()
+        await self.tokens.async_get_token()
+
+    async def _login(self) -> str:
         try:
             json = await self.request(
                 self.host,
                 {"method": "do", "login": {"username": self.username, "password": self.password}},
+                operation="login",
             )
-
-            if json['error_code'] != 0:
-                raise ConfigEntryAuthFailed(f"Failed to authenticate, check host, username and password")
-
-            self.token = json['stok']
+        except CircuitOpenError:
+            raise
         except Exception as e:
             raise IntegrationError(f"Cannot connect router {e}")
 
+        if json.get('error_code') != 0:
+            raise ConfigEntryAuthFailed(f"Failed to authenticate, check host, username and password")
+
+        self.metrics.increment("logins")
+
+        return json['stok']
+
     async def logout(self):
-        if self.token is None:
+        token = self.tokens.token
+        if token is None:
             return
 
-        await self.request(f"{self.host}/stok={self.token}/ds", {"method": "do", "system": {"logout": None}})
+        self.tokens.invalidate(token)
+        await self.request(
+            f"{self.host}/stok={token}/ds", {"method": "do", "system": {"logout": None}}, operation="write"
+        )
 
     async def reboot(self):
-        if self.token is None:
-            await self.authenticate()
-
-        json = await self.request(f"{self.host}/stok={self.token}/ds", {"method": "do", "system": {"reboot": None}})
-
-        if json.get("error_code") == -40401:
-            self.token = None
-            await self.reboot()
+        try:
+            await self.call({"method": "do", "system": {"reboot": None}}, operation="reboot")
+        finally:
+            """ Leave the router alone while it boots, it may drop the connection before answering """
+            self.tokens.invalidate()
+            self.breaker.trip(REBOOT_GRACE_PERIOD)
 
     async def set_ap_light(self, status: str):
-        if self.token is None:
-            await self.authenticate()
-
-        json = await self.request(
-            f"{self.host}/stok={self.token}/ds",
-            {"method": "set", "apmng_set": {"ap_led_global_switch": {"led_switch": status}}}
+        await self.call(
+            {"method": "set", "apmng_set": {"ap_led_global_switch": {"led_switch": status}}}, operation="write"
         )
 
-        if json.get("error_code") == -40401:
-            self.token = None
-            await self.set_ap_light(status)
-
     async def reboot_ap(self, id_list: list):
-        if self.token is None:
-            await self.authenticate()
-
-        json = await self.request(
-            f"{self.host}/stok={self.token}/ds",
-            {"method": "do", "apmng_status": {"ap_reboot": {"entry_id": id_list}}}
-        )
-
-        if json.get("error_code") == -40401:
-            self.token = None
-            await self.reboot_ap(id_list)
+        await self.call({"method": "do", "apmng_status": {"ap_reboot": {"entry_id": id_list}}}, operation="reboot")
 
     async def set_ssid(self, serv_id, para):
-        if self.token is None:
-            await self.authenticate()
-
-        json = await self.request(
-            f"{self.host}/stok={self.token}/ds",
-            {
-                "method": "set",
-                "apmng_wserv": {"table": "wlan_serv", "filter": [{"serv_id": str(serv_id)}], "para": para}
+        await self.set_ssids([serv_id], para)
+
+    async def set_ssids(self, serv_ids: list, para):
+        """ Apply the same para to several SSIDs in one request """
+        await self.call({
+            "method": "set",
+            "apmng_wserv": {
+                "table": "wlan_serv", "filter": [{"serv_id": str(serv_id)} for serv_id in serv_ids], "para": para
             }
-        )
-
-        if json.get("error_code") == -40401:
-            self.token = None
-            await self.set_ssid(serv_id, para)
+        }, operation="write")
 
-    async def get_syslog(self, count: int):
-        if self.token is None:
-            await self.authenticate()
+    async def get_syslog(self, count: int, page: int = 1):
+        """ Newest first, count.syslog holds how many lines the router keeps """
+        return await self.call(
+            {"method": "do", "system": {"read_logs": {"page": str(page), "num_per_page": str(count)}}}
+        )
 
-        json = await self.request(
-            f"{self.host}/stok={self.token}/ds",
-            {"method":"do","system":{"read_logs":{"page":"1","num_per_page":str(count)}}}
+    async def get_status(self, groups=None):
+        """ Fetch the given STATUS_GROUPS (all of them by default) in one request """
+        json = await self.call(
+            build_status_payload(STATUS_GROUPS.keys() if groups is None else groups),
+            stream_decode.async_decode_status if stream_decode.is_available() else None,
         )
 
-        if json.get("error_code") == -40401:
-            self.token = None
-            await self.get_syslog(count)
+        with self.metrics.timer("process"):
+            return self.process_data(json)
 
-        return json
+    async def call(self, payload: dict, decode=None, operation: str = "read") -> dict:
+        """ Send an authenticated request, re-login at most AUTH_RETRY_LIMIT times """
+        for _ in range(AUTH_RETRY_LIMIT + 1):
+            token = await self.tokens.async_get_token()
+            json = await self.request(f"{self.host}/stok={token}/ds", payload, decode, operation)
 
-    async def get_status(self):
-        if self.token is None:
-            await self.authenticate()
-
-        json = await self.request(
-            f"{self.host}/stok={self.token}/ds",
-            {
-                "method": "get",
-                "host_management": {
-                    "name": "host_count_info",
-                    "table": "host_info"
-                },
-                "system": {
-                    "name": [
-                        "cpu_usage",
-                        "mem_usage",
-                        "device_info"
-                    ]
-                },
-                "online_check": {"table": "state", "name": "state"},
-                # "apmng_status": {
-                #     "name": "apmng_status"
-                # },
-                "apmng_set": {
-                    "table": "ap_list",
-                    "filter": [
-                        {"group_id": "0", "ap_role": "re_all"}, {"group_id": "0"}
-                    ],
-                    "para": {"start": 0, "end": 499}
-                },
-                "apmng_wserv": {
-                    "table": "wlan_serv", "filter": {"network_type": ["1", "2", "3"]},
-                    "para": {"start": 0, "end": 9}
-                }
-            })
-
-        """ Authenticate before request """
-        if json.get("error_code") == -40401:
-            self.token = None
-            return await self.get_status()
+            if json.get("error_code") != ERROR_CODE_TOKEN_EXPIRED:
+                return json
 
-        return self.process_data(json)
+            self.tokens.invalidate(token)
+
+        raise IntegrationError(f"Router {self.host} keeps rejecting the session token")
 
     def process_data(self, json):
+        """ Only sections present in the response are processed, so partial polls merge into status """
+        data = {}
         system = json.get("system", {})
 
         """ Calculate cpu used """
-        cpu_usage = system.get('cpu_usage')
-        cpu_usages = [int(v) for v in cpu_usage.values()]
-        cpu_used = sum(cpu_usages) / len(cpu_usages) if cpu_usages else 0
+        if "cpu_usage" in system:
+            cpu_usages = [int(v) for v in system['cpu_usage'].values()]
+            data["cpu_used"] = sum(cpu_usages) / len(cpu_usages) if cpu_usages else 0
+
+        if "mem_usage" in system:
+            data["memory_used"] = system["mem_usage"].get("mem")
+
+        if "device_info" in system:
+            data["device_info"] = system["device_info"]
 
         """ Calculate Wan count and status """
-        _online_check = json.get("online_check", {})
-        state_dict = _online_check.get("state", {})
-        wan_states = [
-            {"key": k.replace("state_", ""), **v}
-            for k, v in state_dict.items()
-        ]
-        wan_count = _online_check.get("count", {}).get("state", None)
-
-        """ Calculate hosts """
-        hosts = json['host_management']['host_info']
-        clean_hosts = [list(item.values())[0] for item in hosts]
-        local_ip = next((host['ip'] for host in clean_hosts if host['is_cur_host']), None)
-        clean_hosts = [
-            {key: unquote(item.get(key, ''))
-             for key in
-             ['connect_date', 'rssi', 'ip', 'hostname', 'connect_time', 'mac', 'type', 'ssid', 'freq_name', 'ap_name']
-             if key in item} for item in clean_hosts
-        ]
-        wireless_hosts = [
-            {k: v for k, v in host.items() if k != "type"}
-            for host in clean_hosts if host.get("type") == "wireless"
-        ]
-        wired_hosts = [
-            {k: v for k, v in host.items() if k != "type"}
-            for host in clean_hosts if host.get("type") == "wired"
-        ]
-        ap_connected_hosts = {
-            ap_name: [
-                host
-                for host in hosts
-                if host.get('ap_name') == ap_name and host.get('type') == 'wireless' and host.get('ip')
+        if "online_check" in json:
+            _online_check = json["online_check"]
+            state_dict = _online_check.get("state", {})
+            data["wan_states"] = [
+                {"key": k.replace("state_", ""), **v}
+                for k, v in state_dict.items()
             ]
-            for ap_name in set(
-                host.get('ap_name', '')
-                for host in hosts
-                if host.get('ap_name') and host.get('type') == 'wireless' and host.get('ip')
-            )
-        }
+            data["wan_count"] = _online_check.get("count", {}).get("state", None)
+
+        if "host_management" in json:
+            data.update(self._process_hosts(json["host_management"]))
+
+        if "apmng_set" in json:
+            data.update(self._process_aps(json["apmng_set"]))
 
-        """ Calculate SSID count """
-        host_count_info = json['host_management']['host_count_info']
+        """ Get SSID List """
+        if "apmng_wserv" in json:
+            ssid_list = json["apmng_wserv"].get("wlan_serv", [])
+            data["ssid_list"] = [
+                {key: unquote(item[key]) for key in SSID_KEYS if key in item}
+                for dict in ssid_list for item in dict.values()
+            ]
+
+        return data
+
+    @staticmethod
+    def _process_hosts(host_management):
+        """ Index hosts by type, AP, SSID and frequency in a single walk """
+        hosts = host_management['host_info']
+        clean_hosts = []
+        hosts_dict = {}
+        wireless_hosts = []
+        wired_hosts = []
+        ap_connected_hosts = {}
+        ssid_counts = {}
+        frequency_counts = {}
+        local_ip = host_management.get('local_ip')
+
+        for item in hosts:
+            if isinstance(item, HostRecord):
+                """ Already built by stream_decode """
+                host = item
+            else:
+                raw_host = next(iter(item.values()))
+
+                if local_ip is None and raw_host.get('is_cur_host'):
+                    local_ip = raw_host['ip']
+
+                host = HostRecord(raw_host)
+
+            """ hosts_dict owns the records, the other collections only reference them """
+            clean_hosts.append(host)
+            hosts_dict[host.mac] = host
+
+            if host.type == "wired":
+                wired_hosts.append(host)
+            elif host.type == "wireless":
+                wireless_hosts.append(host)
+
+                if host.ssid:
+                    ssid_counts[host.ssid] = ssid_counts.get(host.ssid, 0) + 1
+
+                if host.freq_name:
+                    frequency_counts[host.freq_name] = frequency_counts.get(host.freq_name, 0) + 1
+
+                if host.ap_name and host.ip:
+                    ap_connected_hosts.setdefault(host.ap_name, []).append(host)
+
+        """ Prefer the counts reported by router """
+        host_count_info = host_management['host_count_info']
         if 'ssid_host_count' in host_count_info and host_count_info['ssid_host_count']:
-            ssid_host_count = [{"ssid": key, "count": value} for key, value in
-                               host_count_info['ssid_host_count'].items()]
-        else:
-            ssid_counts = {}
-            for host_info in clean_hosts:
-                if host_info.get("type") == "wireless" and host_info.get("ssid"):
-                    ssid = host_info.get("ssid")
-                    if ssid in ssid_counts:
-                        ssid_counts[ssid] += 1
-                    else:
-                        ssid_counts[ssid] = 1
-            ssid_host_count = [{"ssid": ssid, "count": count} for ssid, count in ssid_counts.items()]
+            ssid_counts = host_count_info['ssid_host_count']
 
         if ('wired_host_count' in host_count_info and
                 'wireless_host_count' in host_count_info):
@@ -218,60 +321,98 @@ class TPLinkEnterpriseRouterClient:
             wired_host_count = len(wired_hosts)
             wireless_host_count = len(wireless_hosts)
 
-        ap_list = json.get("apmng_set", {}).get("ap_list", [])
-        ap_list = [inner_dict for item in ap_list for inner_dict in item.values()]
-        ap_list = [{key: unquote(item[key]) for key in ['entry_name', 'entry_id', 'mac', 'status', 'led'] if key in item} for
-                   item in ap_list]
-        ap_count = len(ap_list)
-        ap_online_count = sum(1 for ap in ap_list if ap.get("status") == "2")
-        ap_offline_count = sum(1 for ap in ap_list if ap.get("status") != "2")
-        ap_online_list = [ap for ap in ap_list if ap.get("status") == "2"]
-        ap_offline_list = [ap for ap in ap_list if ap.get("status") != "2"]
-
-        """ Get SSID List """
-        ssid_list = json.get("apmng_wserv", {}).get("wlan_serv", [])
-        ssid_list = [{key: unquote(item[key]) for key in ['ssid', 'enable', 'serv_id'] if key in item} for dict in ssid_list for
-                     item in dict.values()]
-
         return {
             "hosts": clean_hosts,
-            "hosts_dict": {str(item["mac"]): item for item in clean_hosts},
+            "hosts_dict": hosts_dict,
             "wireless_hosts": wireless_hosts,
             "wired_hosts": wired_hosts,
             "ap_connected_hosts": ap_connected_hosts,
             "host_count": len(hosts),
             "wired_host_count": wired_host_count,
             "wireless_host_count": wireless_host_count,
-            "ssid_host_count": ssid_host_count,
-            "cpu_used": cpu_used,
-            "memory_used": system.get("mem_usage", {}).get("mem"),
-            "wan_states": wan_states,
-            "wan_count": wan_count,
-            "device_info": system.get("device_info"),
-            "ap_count": ap_count,
+            "ssid_host_count": [{"ssid": ssid, "count": count} for ssid, count in ssid_counts.items()],
+            "frequency_host_count": [
+                {"freq_name": freq_name, "count": count} for freq_name, count in frequency_counts.items()
+            ],
+            "local_ip": local_ip
+        }
+
+    @staticmethod
+    def _process_aps(apmng_set):
+        ap_list = []
+        ap_online_list = []
+        ap_offline_list = []
+
+        for item in apmng_set.get("ap_list", []):
+            for raw_ap in item.values():
+                ap = {key: unquote(raw_ap[key]) for key in AP_KEYS if key in raw_ap}
+                ap_list.append(ap)
+                (ap_online_list if ap.get("status") == "2" else ap_offline_list).append(ap)
+
+        return {
+            "ap_count": len(ap_list),
             "ap_list": ap_list,
-            "ap_online_count": ap_online_count,
+            "ap_online_count": len(ap_online_list),
             "ap_online_list": ap_online_list,
-            "ap_offline_count": ap_offline_count,
+            "ap_offline_count": len(ap_offline_list),
             "ap_offline_list": ap_offline_list,
-            "ssid_list": ssid_list,
-            "local_ip": local_ip
         }
 
-    async def request(self, url, payload):
+    async def request(self, url, payload, decode=None, operation: str = "read"):
+        """ Only reads are retried, writes and reboots are not idempotent """
+        retries = READ_RETRY_LIMIT if operation == "read" else 0
+
+        for attempt in range(retries + 1):
+            try:
+                self.breaker.before_request()
+            except CircuitOpenError:
+                self.metrics.increment("circuit_open_rejections")
+                raise
+
+            try:
+                async with self.limiter:
+                    with self.metrics.timer("request"):
+                        json = await self._request(url, payload, decode, REQUEST_TIMEOUTS[operation])
+            except asyncio.CancelledError:
+                self.breaker.release_probe()
+                raise
+            except Exception as e:
+                self.breaker.record_failure()
+                self.metrics.increment("errors")
+
+                if attempt == retries or self.breaker.is_open:
+                    raise IntegrationError(f"Fail to request host: {self.host} payload: {payload} error: {e}")
+
+                """ Jittered exponential backoff between retries """
+                await asyncio.sleep(random.uniform(0, READ_RETRY_DELAY * 2 ** attempt))
+                continue
+
+            self.breaker.record_success()
+
+            return json
+
+    async def _request(self, url, payload, decode, timeout: float):
         headers = {
             "Content-Type": "application/json",
         }
-        timeout = ClientTimeout(total=5)
-
-        try:
-            async with self._session.post(
-                    url,
-                    headers=headers,
-                    json=payload,
-                    timeout=timeout,
-            ) as response:
-                return await response.json()
 
-        except Exception as e:
-            raise IntegrationError(f"Fail to request host: {self.host} payload: {payload} error: {e}")
+        async with self._session.post(
+                url,
+                headers=headers,
+                json=payload,
+                timeout=ClientTimeout(total=timeout),
+        ) as response:
+            if decode is not None and (response.content_length or 0) >= STREAM_DECODE_MIN_BYTES:
+                """ Streaming decode overlaps with the transfer, so decode time includes network """
+                reader = CountingReader(response.content)
+                with self.metrics.timer("decode"):
+                    json = await decode(reader)
+                self.metrics.observe("response_bytes", reader.bytes_read)
+
+                return json
+
+            body = await response.read()
+
+        self.metrics.observe("response_bytes", len(body))
+        with self.metrics.timer("decode"):
+            return json_loads(body)
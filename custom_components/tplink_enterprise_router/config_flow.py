@@ -3,6 +3,7 @@ from homeassistant import config_entries
 from homeassistant.core import callback
 from homeassistant.helpers import config_validation as cv
 from .const import (
+    ATTRIBUTE_MODES,
     DOMAIN,
     DEFAULT_INSTANCE_NAME,
     DEFAULT_HOST,
@@ -42,6 +43,20 @@ class TPLinkEnterpriseRouterConfigFlow(config_entries.ConfigFlow, domain=DOMAIN)
                 vol.Required("syslog_event", default="syslog_receiver_message"): str,
                 vol.Required("enable_dedicated_event", default=False): bool,
                 vol.Required("enable_universal_event", default=True): bool,
+                vol.Required("token_refresh_interval", default=0): int,
+                vol.Required("enable_tiered_polling", default=False): bool,
+                vol.Required("system_poll_interval", default=10): int,
+                vol.Required("ap_poll_interval", default=300): int,
+                vol.Required("enable_adaptive_polling", default=False): bool,
+                vol.Required("min_update_interval", default=10): vol.All(int, vol.Range(min=1)),
+                vol.Required("max_update_interval", default=300): int,
+                vol.Required("attribute_mode", default="full"): vol.In(ATTRIBUTE_MODES),
+                vol.Required("attribute_top_n", default=20): int,
+                vol.Required("enable_syslog_listener", default=False): bool,
+                vol.Required("syslog_listen_port", default=5140): int,
+                vol.Required("syslog_event_rate", default=0): int,
+                vol.Required("syslog_event_burst", default=20): int,
+                vol.Required("syslog_batch_interval", default=0): int,
             }),
             errors=errors
         )
@@ -4,6 +4,49 @@ DEFAULT_NAME = "TP Link Enterprise Router"
 DEFAULT_HOST = "http://192.168.0.1"
 DEFAULT_INSTANCE_NAME = "TP Link Enterprise Router"
 PLATFORMS = ["sensor", "button", "switch", "device_tracker"]
+ERROR_CODE_TOKEN_EXPIRED = -40401
+AUTH_RETRY_LIMIT = 1
+AP_KEYS = ('entry_name', 'entry_id', 'mac', 'status', 'led')
+SSID_KEYS = ('ssid', 'enable', 'serv_id')
+SSID_WRITE_WINDOW = 0.5
+REQUEST_TIMEOUTS = {
+    "login": 5,
+    "read": 5,
+    "write": 10,
+    "reboot": 30,
+}
+READ_RETRY_LIMIT = 1
+READ_RETRY_DELAY = 0.5
+BREAKER_FAILURE_THRESHOLD = 3
+BREAKER_BASE_DELAY = 5
+BREAKER_MAX_DELAY = 300
+REBOOT_GRACE_PERIOD = 60
+SNAPSHOT_SAVE_DELAY = 60
+STREAM_DECODE_MIN_BYTES = 4 * 1024 * 1024
+TRACKER_SAVE_DELAY = 10
+TRACKING_CACHE_SIZE = 4096
+TRACKING_CACHE_TTL = 3600
+SYSLOG_MIN_PAGE_SIZE = 50
+SYSLOG_MAX_PAGE_SIZE = 200
+SYSLOG_PAGE_HEADROOM = 1.5
+SYSLOG_MAX_CATCHUP_PAGES = 10
+DATA_SYSLOG_LISTENERS = "syslog_listeners"
+DATA_SYSLOG_BUS_ROUTERS = "syslog_bus_routers"
+SYSLOG_QUEUE_SIZE = 1000
+SYSLOG_MAX_REPORTED_SOURCES = 16
+DATA_POLL_SCHEDULER = "poll_scheduler"
+MAX_CONCURRENT_REQUESTS_PER_HOST = 2
+ATTRIBUTE_MODES = ("full", "top_n", "summary")
+SERVICE_GET_LIST = "get_list"
+PAGED_LISTS = (
+    "hosts",
+    "wireless_hosts",
+    "wired_hosts",
+    "ap_connected_hosts",
+    "ap_list",
+    "ap_online_list",
+    "ap_offline_list",
+)
 MIN_SEVERITY_LEVELS = {
     "emerg": 0,
     "alert": 1,
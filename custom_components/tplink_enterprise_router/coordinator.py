@@ -1,21 +1,35 @@
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
+import time
 from datetime import timedelta
 from urllib.parse import unquote
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryAuthFailed, IntegrationError
 from homeassistant.helpers.device_registry import CONNECTION_NETWORK_MAC
 from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
 from custom_components.tplink_enterprise_router.client import TPLinkEnterpriseRouterClient
-from .const import DOMAIN
+from .const import DOMAIN, SNAPSHOT_SAVE_DELAY, SSID_WRITE_WINDOW
+from .host_diff import HostChangeSet, HostDiffEngine
+from .host_record import HostRecord
+from .polling import build_adaptive_interval, build_poll_scheduler, get_domain_scheduler
 from .syslog_tracker import SyslogTracker
 
 _LOGGER = logging.getLogger(__name__)
 
+""" Runtime state and host collections rebuilt from the compact host list """
+SNAPSHOT_EXCLUDED_KEYS = frozenset({
+    "polling", "stale", "metrics", "syslog",
+    "hosts", "hosts_dict", "wireless_hosts", "wired_hosts", "ap_connected_hosts",
+})
+
 
 class TPLinkEnterpriseRouterCoordinator(DataUpdateCoordinator):
 
@@ -27,24 +41,46 @@ class TPLinkEnterpriseRouterCoordinator(DataUpdateCoordinator):
         self.host = entry.data.get('host')
         username = entry.data.get('username')
         password = entry.data.get('password')
-        update_interval = entry.data.get('update_interval', 30)
         unique_id = entry.data.get('unique_id', entry.entry_id)
         self.status = {
             "polling": True,
+            "stale": False,
         }
         self.device_info = None
         self.unique_id = unique_id
         self.force_update = False
 
         self.entry = entry
-        self.client = TPLinkEnterpriseRouterClient(hass, self.host, username, password)
+        self.domain_scheduler = get_domain_scheduler(hass)
+        self.domain_scheduler.register(entry.entry_id, self.host)
+        self.client = TPLinkEnterpriseRouterClient(
+            hass,
+            self.host,
+            username,
+            password,
+            entry.data.get('token_refresh_interval', 0),
+            limiter=self.domain_scheduler.limiter(self.host),
+            breaker=self.domain_scheduler.breaker(self.host, entry.data.get('update_interval', 30)),
+        )
         self.syslog_tracker = SyslogTracker(hass, entry, self.client)
+        self.poll_scheduler = build_poll_scheduler(entry.data)
+        self.adaptive_interval = build_adaptive_interval(entry.data)
+        if self.adaptive_interval is not None:
+            self.poll_scheduler.set_update_interval(self.adaptive_interval.interval)
+        self.attribute_limit = self._attribute_limit(entry.data)
+        self.host_diff = HostDiffEngine()
+        self.host_changes = HostChangeSet()
+        """ Status groups fetched by the last update, entities skip rebuilding from the others """
+        self.polled_groups: frozenset[str] = frozenset()
+        self._pending_ssid_writes: dict[str, dict] = {}
+        self._ssid_flush: asyncio.Task | None = None
+        self.snapshot_store = Store(hass, version=1, key=f"{DOMAIN}_{entry.entry_id}_status")
 
         super().__init__(
             hass,
             _LOGGER,
             name="TPLinkEnterpriseRouter",
-            update_interval=timedelta(seconds=update_interval),
+            update_interval=timedelta(seconds=self.poll_scheduler.tick_interval),
         )
 
     async def reboot(self) -> None:
@@ -73,11 +109,71 @@ class TPLinkEnterpriseRouterCoordinator(DataUpdateCoordinator):
         await self.async_refresh()
 
     async def set_ssid(self, serv_id: str, para) -> None:
-        await self.client.set_ssid(serv_id, para)
-        await self.async_refresh()
+        """ Queue the change, writes within SSID_WRITE_WINDOW share one request """
+        serv_id = str(serv_id)
+        self._pending_ssid_writes[serv_id] = {**self._pending_ssid_writes.get(serv_id, {}), **para}
+
+        if self._ssid_flush is None:
+            self._ssid_flush = self.hass.async_create_task(self._async_flush_ssid_writes())
+
+        await asyncio.shield(self._ssid_flush)
+
+    async def _async_flush_ssid_writes(self) -> None:
+        await asyncio.sleep(SSID_WRITE_WINDOW)
+
+        writes = self._pending_ssid_writes
+        self._pending_ssid_writes = {}
+        self._ssid_flush = None
+
+        """ One request per distinct para """
+        batches = {}
+        for serv_id, para in writes.items():
+            batches.setdefault(json.dumps(para, sort_keys=True), (para, []))[1].append(serv_id)
+
+        for para, serv_ids in batches.values():
+            await self.client.set_ssids(serv_ids, para)
+
+        await self.async_refresh_ssids()
+
+    async def async_refresh_ssids(self) -> None:
+        """ Read back only the wlan_serv table """
+        data = await self.client.get_status(["ssids"])
+        self.poll_scheduler.mark(["ssids"])
+        self.polled_groups = frozenset(["ssids"])
+        self.host_changes = HostChangeSet()
+        self.set_status(self._with_ssid_status(data))
+        self.async_update_listeners()
+
+    @staticmethod
+    def _attribute_limit(data) -> int | None:
+        """ How many list entries sensors put in their attributes, None for all of them """
+        mode = data.get("attribute_mode", "full")
+
+        if mode == "summary":
+            return 0
+        if mode == "top_n":
+            return max(data.get("attribute_top_n", 20), 0)
+
+        return None
+
+    @staticmethod
+    def _with_ssid_status(data: dict) -> dict:
+        """ Update ssid status """
+        for ssid in data.get("ssid_list", []):
+            serv_id = ssid.get("serv_id")
+            _property = f"__SSID_{serv_id}"
+            data[_property] = ssid.get("enable") == 'on'
+
+        return data
+
+    @callback
+    def async_update_listeners(self) -> None:
+        with self.client.metrics.timer("entity_update"):
+            super().async_update_listeners()
 
     async def refresh(self) -> None:
         self.force_update = True
+        self.poll_scheduler.invalidate()
         await self.async_refresh()
 
     def set_status(self, data) -> None:
@@ -87,42 +183,117 @@ class TPLinkEnterpriseRouterCoordinator(DataUpdateCoordinator):
         }
 
     async def _async_update_data(self):
+        self.host_changes = HostChangeSet()
+        self.polled_groups = frozenset()
+
         if not self.status["polling"] and not self.force_update:
             return
 
         self.force_update = False
 
-        """ Pull status """
-        data = await self.client.get_status()
+        """ Pull the status groups that are due """
+        groups = self.poll_scheduler.due()
+        started = time.monotonic()
+        try:
+            data = await self.domain_scheduler.async_get_status(self.client, groups) if groups else {}
+        except ConfigEntryAuthFailed:
+            raise
+        except IntegrationError as e:
+            """
+            Keep serving the last known status while the router is down, that includes the
+            failure that trips the breaker and failed probes, not only the requests it rejects
+            """
+            if "hosts" not in self.status or not self.client.breaker.is_open:
+                raise
+            _LOGGER.debug("Serving stale status: %s", e)
+            self.set_status({"stale": True, "metrics": self.client.metrics.snapshot()})
+            return
 
-        """ Update ssid status """
-        ssid_list = data.get("ssid_list", [])
-        for ssid in ssid_list:
-            serv_id = ssid.get("serv_id")
-            _property = f"__SSID_{serv_id}"
-            data[_property] = ssid.get("enable") == 'on'
+        data["stale"] = False
+        latency = time.monotonic() - started if groups else None
+        self.poll_scheduler.mark(groups)
+        self.polled_groups = frozenset(groups)
+        ap_changed = "ap_online_count" in data and data["ap_online_count"] != self.status.get("ap_online_count")
+
+        self._with_ssid_status(data)
+        data["metrics"] = self.client.metrics.snapshot()
+        data["syslog"] = self.syslog_tracker.stats()
+
+        """ Diff hosts against the previous poll """
+        if "hosts_dict" in data:
+            self.host_changes = self.host_diff.update(data["hosts_dict"])
 
         self.set_status(data)
 
+        """ Adapt polling rate to activity and router load, only hosts ticks can tell whether it was quiet """
+        if self.adaptive_interval is not None and "hosts" in groups:
+            changed = bool(self.host_changes.touched) or ap_changed
+            interval = self.adaptive_interval.update(changed, self.status.get("cpu_used"), latency, groups)
+            self.poll_scheduler.set_update_interval(interval)
+
+        """ Keep to the router's slot by moving the next timer, this refresh is never held back """
+        tick_interval = self.poll_scheduler.tick_interval
+        delay = self.domain_scheduler.stagger_delay(self.entry.entry_id, tick_interval)
+        if delay < tick_interval / 2:
+            delay += tick_interval
+        self.update_interval = timedelta(seconds=delay)
+
         """ Build DeviceInfo """
-        if self.device_info is None:
-            if data['device_info'].get('model'):
-                self.router_name = f"TP-Link {data['device_info']['model']} ({self.host})"
-
-            if data['device_info'].get('firmware_version'):
-                self.firmware_version = unquote(data['device_info']['firmware_version'])
-
-            self.device_info = DeviceInfo(
-                configuration_url=self.host,
-                connections={(CONNECTION_NETWORK_MAC, data['device_info']['mac'])},
-                identifiers={(DOMAIN, data['device_info']['mac'])},
-                manufacturer="TP-Link",
-                model=data['device_info']['model'],
-                name=self.router_name,
-                sw_version=self.firmware_version,
-                hw_version=data['device_info']['hardware_version'],
-            )
-
-        """ SyslogTracker poll """
-        if self.entry.data.get("enable_syslog_poll_event", False):
-            await self.syslog_tracker.poll()
\ No newline at end of file
+        if self.device_info is None and data.get('device_info'):
+            self._build_device_info(data['device_info'])
+
+        """ Persist for warm start """
+        if "hosts" in data:
+            self.snapshot_store.async_delay_save(self._build_snapshot, SNAPSHOT_SAVE_DELAY)
+
+        """ SyslogTracker poll, at update_interval like the host table rather than every tiered tick """
+        if self.entry.data.get("enable_syslog_poll_event", False) and "hosts" in groups:
+            await self.syslog_tracker.poll()
+
+    def _build_device_info(self, device_info: dict) -> None:
+        if device_info.get('model'):
+            self.router_name = f"TP-Link {device_info['model']} ({self.host})"
+
+        if device_info.get('firmware_version'):
+            self.firmware_version = unquote(device_info['firmware_version'])
+
+        self.device_info = DeviceInfo(
+            configuration_url=self.host,
+            connections={(CONNECTION_NETWORK_MAC, device_info['mac'])},
+            identifiers={(DOMAIN, device_info['mac'])},
+            manufacturer="TP-Link",
+            model=device_info['model'],
+            name=self.router_name,
+            sw_version=self.firmware_version,
+            hw_version=device_info['hardware_version'],
+        )
+
+    def _build_snapshot(self) -> dict:
+        return {
+            "status": {key: value for key, value in self.status.items() if key not in SNAPSHOT_EXCLUDED_KEYS},
+            "hosts": [host.to_values() for host in self.status.get("hosts", [])],
+        }
+
+    async def async_restore_snapshot(self) -> bool:
+        """ Load the last good status so platforms can be set up before the router answers """
+        snapshot = await self.snapshot_store.async_load()
+        if not snapshot:
+            return False
+
+        try:
+            records = [HostRecord.from_values(values) for values in snapshot["hosts"]]
+            data = TPLinkEnterpriseRouterClient._process_hosts({"host_info": records, "host_count_info": {}})
+            data.update(snapshot["status"])
+
+            if data.get('device_info'):
+                self._build_device_info(data['device_info'])
+        except (KeyError, TypeError, ValueError) as e:
+            _LOGGER.warning("Ignoring unreadable status snapshot: %s", e)
+            return False
+
+        """ Stale until the first refresh succeeds """
+        data["stale"] = True
+        self.set_status(data)
+        self.host_diff.snapshot = data["hosts_dict"]
+
+        return True
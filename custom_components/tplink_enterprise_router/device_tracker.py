@@ -1,4 +1,3 @@
-import asyncio
 import logging
 
 from homeassistant.components.device_tracker import ScannerEntity, SourceType
@@ -8,10 +7,10 @@ from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers import translation
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.storage import Store
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from . import TPLinkEnterpriseRouterCoordinator
-from .const import DOMAIN
+from .const import DOMAIN, TRACKER_SAVE_DELAY
+from .entity import TPLinkEnterpriseRouterEntity
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -34,12 +33,15 @@ async def async_setup_entry(
     @callback
     def coordinator_updated():
         """Update the status of the devices."""
-        asyncio.create_task(async_callback())
+        tracker.dispatch(coordinator.host_changes)
+        """ Taken now, another update may replace host_changes before the task runs """
+        hass.async_create_task(async_callback(coordinator.status['hosts_dict'], coordinator.host_changes.added))
 
-    async def async_callback():
-        await tracker.update_hosts(coordinator.status['hosts_dict'])
+    async def async_callback(hosts_dict: dict, added: set):
+        await tracker.update_hosts(hosts_dict, added)
 
     entry.async_on_unload(coordinator.async_add_listener(coordinator_updated))
+    entry.async_on_unload(tracker.async_flush)
     coordinator_updated()
 
 
@@ -56,13 +58,16 @@ class DeviceTracker:
         self.hass = hass
         self.entry = entry
         self.store = Store(hass, version=1, key=f"{DOMAIN}_{entry.entry_id}")
-        self.mac_list = []
-        self.tracked: {str, TPLinkTracker} = {}
+        self.macs: set[str] = set()
+        self.dirty = False
+        self.scanned = False
+        self.tracked: dict[str, TPLinkTracker] = {}
+        self._last_available = None
         self.coordinator = coordinator
         self.async_add_entities = async_add_entities
 
     async def init(self):
-        self.mac_list = await self._get_tracked_mac_list()
+        self.macs = set(await self._get_tracked_mac_list())
 
         """ Setup translations """
         translations = await translation.async_get_translations(
@@ -79,37 +84,62 @@ class DeviceTracker:
         )
 
     async def create_old_hosts(self):
-        entities = []
-        for mac in self.mac_list:
-            entity = TPLinkTracker(mac, self.coordinator)
-            entities.append(entity)
-            self.tracked[mac] = entity
-        self.async_add_entities(entities, False)
+        self._add_entities(self.macs)
+
+    async def update_hosts(self, host_dict: dict, added=None) -> None:
+        """ Only hosts new to this poll can be new to the registry, the first call checks them all """
+        candidates = host_dict.keys() if added is None or not self.scanned else added
+        self.scanned = True
 
-    async def update_hosts(self, host_dict: dict) -> None:
-        new_mac_list = list(host_dict.keys())
-        added = list(set(new_mac_list) - set(self.mac_list))
-        removed = list(set(self.mac_list) - set(new_mac_list))
+        new_macs = [mac for mac in candidates if mac not in self.macs]
+        if not new_macs:
+            return
 
-        merged_mac_list = list(set(self.mac_list + new_mac_list))
-        self.mac_list = merged_mac_list
-        await self._save_tracked_mac_list(merged_mac_list)
+        self.macs.update(new_macs)
+        self.dirty = True
+        self.store.async_delay_save(self._data_to_save, TRACKER_SAVE_DELAY)
 
+        self._add_entities(new_macs)
+
+    @callback
+    def dispatch(self, changes) -> None:
+        """ One pass per poll, only trackers of hosts that changed hear about it """
+        available = self.coordinator.last_update_success
+
+        if available != self._last_available:
+            self._last_available = available
+            macs = self.tracked.keys()
+        else:
+            macs = changes.touched
+
+        for mac in macs:
+            entity = self.tracked.get(mac)
+            if entity is not None and entity.hass is not None:
+                entity.async_update_host()
+
+    def _add_entities(self, macs) -> None:
         entities = []
-        for mac in added:
+        for mac in macs:
             entity = TPLinkTracker(mac, self.coordinator)
             entities.append(entity)
+            self.tracked[mac] = entity
         self.async_add_entities(entities, False)
 
+    async def async_flush(self) -> None:
+        """ Write a pending delayed save now, the entry is going away """
+        if self.dirty:
+            await self._async_save_data(self._data_to_save())
+
+    def _data_to_save(self) -> dict:
+        self.dirty = False
+        return {
+            "mac_list": list(self.macs)
+        }
+
     async def _get_tracked_mac_list(self) -> list:
         data = await self._async_load_data()
         return data.get("mac_list", [])
 
-    async def _save_tracked_mac_list(self, mac_list: list) -> None:
-        await self._async_save_data({
-            "mac_list": mac_list
-        })
-
     async def _async_load_data(self) -> dict:
         data = await self.store.async_load()
         return data or {}
@@ -118,9 +148,11 @@ class DeviceTracker:
         await self.store.async_save(data)
 
 
-class TPLinkTracker(CoordinatorEntity, BaseTrackerEntity):
+class TPLinkTracker(TPLinkEnterpriseRouterEntity, BaseTrackerEntity):
     """Representation of network device."""
 
+    _coordinator_listener = False
+
     def __init__(
             self,
             mac,
@@ -207,8 +239,12 @@ class TPLinkTracker(CoordinatorEntity, BaseTrackerEntity):
     def entity_registry_enabled_default(self) -> bool:
         return True
 
+    def _state_fingerprint(self) -> tuple:
+        """ Name and icon follow the host too """
+        return self.state, self.name, self.icon, self.extra_state_attributes
+
     @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
+    def async_update_host(self) -> None:
+        """Called by DeviceTracker.dispatch when this host changed."""
         self.device = self.coordinator.status['hosts_dict'].get(self.mac, {})
-        self.async_write_ha_state()
+        self.async_write_ha_state_if_changed()
@@ -0,0 +1,40 @@
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import BaseCoordinatorEntity, CoordinatorEntity
+
+from .coordinator import TPLinkEnterpriseRouterCoordinator
+
+
+class TPLinkEnterpriseRouterEntity(CoordinatorEntity[TPLinkEnterpriseRouterCoordinator]):
+    """Coordinator entity that only writes its state when something visible changed."""
+
+    _last_fingerprint = None
+    """ Entities updated by a dispatcher instead of every coordinator update """
+    _coordinator_listener = True
+
+    def _state_fingerprint(self) -> tuple:
+        """ Value and attributes as written to the state machine """
+        raise NotImplementedError
+
+    def _fingerprint(self) -> tuple:
+        return self.available, self._state_fingerprint()
+
+    async def async_added_to_hass(self) -> None:
+        if self._coordinator_listener:
+            await super().async_added_to_hass()
+        else:
+            """ BaseCoordinatorEntity is the one subscribing to the coordinator, continue past it """
+            await super(BaseCoordinatorEntity, self).async_added_to_hass()
+
+        """ Adding the entity wrote its first state """
+        self._last_fingerprint = self._fingerprint()
+
+    @callback
+    def async_write_ha_state_if_changed(self) -> None:
+        fingerprint = self._fingerprint()
+
+        """ Plain equality, the attributes are rebuilt every poll so nothing is shared with the last one """
+        if fingerprint == self._last_fingerprint:
+            return
+
+        self._last_fingerprint = fingerprint
+        self.async_write_ha_state()
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from .host_record import HOST_KEYS, HostRecord
+
+""" Fields that drift on every poll without the host really changing """
+VOLATILE_HOST_FIELDS = frozenset({"connect_time", "rssi"})
+
+
+@dataclass
+class HostChangeSet:
+    added: set[str] = field(default_factory=set)
+    removed: set[str] = field(default_factory=set)
+    modified: dict[str, set[str]] = field(default_factory=dict)
+    """ Added, removed and hosts with a change outside VOLATILE_HOST_FIELDS """
+    touched: set[str] = field(default_factory=set)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.modified)
+
+
+class HostDiffEngine:
+    """Keep the previous host snapshot keyed by MAC and diff each poll against it."""
+
+    def __init__(self):
+        self.snapshot: dict[str, HostRecord] = {}
+
+    def update(self, hosts_dict: dict[str, HostRecord]) -> HostChangeSet:
+        previous = self.snapshot
+        changes = HostChangeSet(
+            added=hosts_dict.keys() - previous.keys(),
+            removed=previous.keys() - hosts_dict.keys(),
+        )
+
+        for mac, host in hosts_dict.items():
+            old_host = previous.get(mac)
+
+            if old_host is None or old_host == host:
+                continue
+
+            fields = {key for key in HOST_KEYS if old_host.get(key) != host.get(key)}
+            changes.modified[mac] = fields
+
+            if not fields <= VOLATILE_HOST_FIELDS:
+                changes.touched.add(mac)
+
+        changes.touched |= changes.added | changes.removed
+        self.snapshot = hosts_dict
+
+        return changes
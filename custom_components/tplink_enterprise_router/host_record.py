@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import sys
+from urllib.parse import unquote
+
+HOST_KEYS = ('connect_date', 'rssi', 'ip', 'hostname', 'connect_time', 'mac', 'type', 'ssid', 'freq_name', 'ap_name')
+
+""" Values shared by many hosts, one string object each """
+INTERNED_HOST_KEYS = frozenset({'type', 'ssid', 'freq_name', 'ap_name'})
+
+
+class HostRecord:
+    """Compact host entry, fields missing from the router response are None."""
+
+    __slots__ = HOST_KEYS
+
+    def __init__(self, raw_host: dict):
+        for key in HOST_KEYS:
+            value = raw_host.get(key)
+
+            if value is not None:
+                value = unquote(value)
+
+                if key in INTERNED_HOST_KEYS:
+                    value = sys.intern(value)
+
+            setattr(self, key, value)
+
+    @classmethod
+    def from_values(cls, values) -> HostRecord:
+        """ Rebuild a record from to_values(), the values are already decoded """
+        record = cls.__new__(cls)
+
+        for key, value in zip(HOST_KEYS, values, strict=True):
+            if value is not None and key in INTERNED_HOST_KEYS:
+                value = sys.intern(value)
+
+            setattr(record, key, value)
+
+        return record
+
+    def to_values(self) -> list:
+        return [getattr(self, key) for key in HOST_KEYS]
+
+    def get(self, key: str, default=None):
+        value = getattr(self, key, None)
+        return default if value is None else value
+
+    def as_dict(self, exclude=()) -> dict:
+        """ Same shape as the raw host dict, used for state attributes """
+        return {
+            key: value
+            for key in HOST_KEYS
+            if key not in exclude and (value := getattr(self, key)) is not None
+        }
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, HostRecord):
+            return NotImplemented
+
+        return self.to_values() == other.to_values()
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"HostRecord({self.as_dict()})"
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+METRICS_WINDOW = 256
+
+
+class RollingWindow:
+    """Keep the last METRICS_WINDOW samples for percentiles."""
+
+    def __init__(self, size: int = METRICS_WINDOW):
+        self.samples = deque(maxlen=size)
+
+    def add(self, value: float) -> None:
+        self.samples.append(value)
+
+    def summary(self) -> dict:
+        if not self.samples:
+            return {}
+
+        ordered = sorted(self.samples)
+        last = len(ordered) - 1
+
+        return {
+            "last": self.samples[-1],
+            "p50": ordered[round(last * 0.50)],
+            "p95": ordered[round(last * 0.95)],
+            "p99": ordered[round(last * 0.99)],
+            "count": len(ordered),
+        }
+
+
+class Metrics:
+    """Timings in milliseconds and sizes in bytes of one router's request pipeline."""
+
+    def __init__(self):
+        self.windows: dict[str, RollingWindow] = {}
+        self.counters = Counter()
+
+    def observe(self, name: str, value: float) -> None:
+        if name not in self.windows:
+            self.windows[name] = RollingWindow()
+        self.windows[name].add(value)
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        self.counters[name] += amount
+
+    @contextmanager
+    def timer(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - started) * 1000)
+
+    def snapshot(self) -> dict:
+        return {
+            **{name: window.summary() for name, window in self.windows.items()},
+            **self.counters,
+        }
+
+
+class CountingReader:
+    """Wrap an aiohttp StreamReader and count the bytes read through it."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.bytes_read = 0
+
+    async def read(self, size: int = -1) -> bytes:
+        chunk = await self.stream.read(size)
+        self.bytes_read += len(chunk)
+        return chunk
@@ -2,6 +2,7 @@ import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.helpers import config_validation as cv
 from .const import (
+    ATTRIBUTE_MODES,
     DEFAULT_INSTANCE_NAME,
     DEFAULT_HOST,
 )
@@ -42,6 +43,20 @@ class TPLinkEnterpriseRouterOptionsFlowHandler(config_entries.OptionsFlow):
             vol.Required("syslog_event", default=data.get("syslog_event", "syslog_receiver_message")): str,
             vol.Required("enable_dedicated_event", default=data.get("enable_dedicated_event", False)): bool,
             vol.Required("enable_universal_event", default=data.get("enable_universal_event", False)): bool,
+            vol.Required("token_refresh_interval", default=data.get("token_refresh_interval", 0)): int,
+            vol.Required("enable_tiered_polling", default=data.get("enable_tiered_polling", False)): bool,
+            vol.Required("system_poll_interval", default=data.get("system_poll_interval", 10)): int,
+            vol.Required("ap_poll_interval", default=data.get("ap_poll_interval", 300)): int,
+            vol.Required("enable_adaptive_polling", default=data.get("enable_adaptive_polling", False)): bool,
+            vol.Required("min_update_interval", default=data.get("min_update_interval", 10)): vol.All(int, vol.Range(min=1)),
+            vol.Required("max_update_interval", default=data.get("max_update_interval", 300)): int,
+            vol.Required("attribute_mode", default=data.get("attribute_mode", "full")): vol.In(ATTRIBUTE_MODES),
+            vol.Required("attribute_top_n", default=data.get("attribute_top_n", 20)): int,
+            vol.Required("enable_syslog_listener", default=data.get("enable_syslog_listener", False)): bool,
+            vol.Required("syslog_listen_port", default=data.get("syslog_listen_port", 5140)): int,
+            vol.Required("syslog_event_rate", default=data.get("syslog_event_rate", 0)): int,
+            vol.Required("syslog_event_burst", default=data.get("syslog_event_burst", 20)): int,
+            vol.Required("syslog_batch_interval", default=data.get("syslog_batch_interval", 0)): int,
         }
 
         return self.async_show_form(step_id="init", data_schema=vol.Schema(scheme))
\ No newline at end of file
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+from .circuit_breaker import CircuitBreaker
+from .client import STATUS_GROUPS
+from .const import BREAKER_BASE_DELAY, DATA_POLL_SCHEDULER, DOMAIN, MAX_CONCURRENT_REQUESTS_PER_HOST
+
+
+class PollScheduler:
+    """Decide which status groups are due on a coordinator tick.
+
+    An interval of 0 polls the group on every tick, None polls it once.
+    """
+
+    def __init__(self, intervals: dict[str, float | None], update_interval: float, followers=()):
+        self.intervals = intervals
+        """ Groups polled at update_interval, which adaptive polling may change """
+        self.followers = tuple(followers)
+        self.last_polled: dict[str, float] = {}
+        self.set_update_interval(update_interval)
+
+    def set_update_interval(self, update_interval: float) -> None:
+        for group in self.followers:
+            self.intervals[group] = update_interval
+
+        """ The coordinator ticks as often as the fastest group """
+        self.tick_interval = min((interval for interval in self.intervals.values() if interval), default=update_interval)
+
+    def due(self, now: float | None = None) -> list[str]:
+        now = time.monotonic() if now is None else now
+
+        """ Ticks drift a little, don't push a group a whole tick late """
+        slack = self.tick_interval / 2
+        groups = []
+
+        for group, interval in self.intervals.items():
+            last_polled = self.last_polled.get(group)
+
+            if last_polled is None:
+                groups.append(group)
+            elif interval is not None and now - last_polled + slack >= interval:
+                groups.append(group)
+
+        return groups
+
+    def mark(self, groups, now: float | None = None) -> None:
+        now = time.monotonic() if now is None else now
+
+        for group in groups:
+            self.last_polled[group] = now
+
+    def invalidate(self, *groups: str) -> None:
+        """ Poll the groups on the next tick, all of them if none are given """
+        for group in groups or list(self.last_polled):
+            self.last_polled.pop(group, None)
+
+
+def build_poll_scheduler(data: dict) -> PollScheduler:
+    update_interval = data.get('update_interval', 30)
+
+    if not data.get('enable_tiered_polling', False):
+        intervals = {group: 0 for group in STATUS_GROUPS}
+        followers = ()
+    else:
+        ap_interval = data.get('ap_poll_interval', 300)
+        intervals = {
+            "system": data.get('system_poll_interval', 10),
+            "hosts": update_interval,
+            "aps": ap_interval,
+            "ssids": ap_interval,
+        }
+        followers = ("hosts",)
+
+    """ Device info never changes while the integration is loaded """
+    intervals["device_info"] = None
+
+    return PollScheduler(intervals, update_interval, followers)
+
+
+class AdaptiveInterval:
+    """Shorten the update interval while the network changes, stretch it while quiet or the router is busy."""
+
+    def __init__(
+            self,
+            interval: float,
+            min_interval: float,
+            max_interval: float,
+            cpu_threshold: float = 80,
+            latency_factor: float = 3,
+    ):
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.interval = min(max(interval, self.min_interval), self.max_interval)
+        self.cpu_threshold = cpu_threshold
+        self.latency_factor = latency_factor
+        """ Moving average per set of polled groups, a host table takes longer than cpu/mem alone """
+        self.latency_averages: dict[tuple[str, ...], float] = {}
+
+    def update(self, changed: bool, cpu_used: float | None, latency: float | None, groups=()) -> float:
+        slow = False
+        if latency is not None:
+            """ Compare against a moving average, routers differ a lot in baseline latency """
+            key = tuple(sorted(groups))
+            average = self.latency_averages.get(key, latency)
+            slow = latency > average * self.latency_factor
+            self.latency_averages[key] = average * 0.8 + latency * 0.2
+
+        busy = cpu_used is not None and cpu_used >= self.cpu_threshold
+
+        if busy or slow:
+            interval = self.interval * 2
+        elif changed:
+            interval = self.interval / 2
+        else:
+            interval = self.interval * 1.25
+
+        self.interval = min(max(interval, self.min_interval), self.max_interval)
+
+        return self.interval
+
+
+def build_adaptive_interval(data: dict) -> AdaptiveInterval | None:
+    if not data.get('enable_adaptive_polling', False):
+        return None
+
+    """ An interval of 0 would poll the router as fast as it answers """
+    return AdaptiveInterval(
+        data.get('update_interval', 30),
+        max(data.get('min_update_interval', 10), 1),
+        data.get('max_update_interval', 300),
+    )
+
+
+class DomainPollScheduler:
+    """Shared by every config entry: staggers their polls, holds the per router
+    host request limiter and circuit breaker and merges identical status fetches."""
+
+    def __init__(self, max_concurrent_requests: int = MAX_CONCURRENT_REQUESTS_PER_HOST):
+        self.max_concurrent_requests = max_concurrent_requests
+        """ Router host of each registered entry """
+        self.entry_hosts: dict[str, str] = {}
+        self.epoch = time.monotonic()
+        self._limiters: dict[str, asyncio.Semaphore] = {}
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._in_flight: dict[tuple, asyncio.Future] = {}
+
+    def register(self, entry_id: str, host: str) -> None:
+        self.entry_hosts[entry_id] = host
+
+    def unregister(self, entry_id: str) -> None:
+        self.entry_hosts.pop(entry_id, None)
+
+    def stagger_delay(self, entry_id: str, interval: float, now: float | None = None) -> float:
+        """
+        Time until the entry's next slot, routers are spread evenly over the interval.
+        Entries of one router share its slot so their fetches overlap and merge.
+        """
+        """ A lone entry has nobody to merge with or keep away from """
+        if entry_id not in self.entry_hosts or len(self.entry_hosts) < 2 or interval <= 0:
+            return 0
+
+        now = time.monotonic() if now is None else now
+        hosts = list(dict.fromkeys(self.entry_hosts.values()))
+        slot = interval * hosts.index(self.entry_hosts[entry_id]) / len(hosts)
+
+        return (slot - (now - self.epoch)) % interval
+
+    def limiter(self, host: str) -> asyncio.Semaphore:
+        if host not in self._limiters:
+            self._limiters[host] = asyncio.Semaphore(self.max_concurrent_requests)
+
+        return self._limiters[host]
+
+    def breaker(self, host: str, poll_interval: float = 0) -> CircuitBreaker:
+        """
+        Entries pointing at the same router share its breaker. The backoff starts at the
+        slowest poll interval, shorter delays would let every poll through anyway.
+        """
+        base_delay = max(BREAKER_BASE_DELAY, poll_interval)
+
+        if host not in self._breakers:
+            self._breakers[host] = CircuitBreaker(host, base_delay=base_delay)
+        else:
+            self._breakers[host].base_delay = max(self._breakers[host].base_delay, base_delay)
+
+        return self._breakers[host]
+
+    async def async_get_status(self, client, groups) -> dict:
+        """ Entries asking the same router for the same groups share one request """
+        key = (client.host, client.username, tuple(sorted(groups)))
+        future = self._in_flight.get(key)
+
+        if future is None:
+            future = self._in_flight[key] = asyncio.ensure_future(client.get_status(groups))
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            client.metrics.increment("merged_fetches")
+
+        """ Callers add their own keys to the result """
+        return dict(await asyncio.shield(future))
+
+
+def get_domain_scheduler(hass) -> DomainPollScheduler:
+    domain_data = hass.data.setdefault(DOMAIN, {})
+
+    if DATA_POLL_SCHEDULER not in domain_data:
+        domain_data[DATA_POLL_SCHEDULER] = DomainPollScheduler()
+
+    return domain_data[DATA_POLL_SCHEDULER]
@@ -1,5 +1,6 @@
 from collections.abc import Callable
 from dataclasses import dataclass
+from itertools import islice
 from typing import Any
 from urllib.parse import unquote
 
@@ -9,61 +10,128 @@ from homeassistant.components.sensor import (
     SensorEntityDescription,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import PERCENTAGE
+from homeassistant.const import PERCENTAGE, UnitOfInformation, UnitOfTime
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DOMAIN
 from .coordinator import TPLinkEnterpriseRouterCoordinator
+from .entity import TPLinkEnterpriseRouterEntity
 
 
 @dataclass
 class TPLinkEnterpriseRouterSensorRequiredKeysMixin:
     value: Callable[[Any], Any]
-    attrs: Callable[[Any], Any]
+    attrs: Callable[[Any, int | None], Any]
 
 
 @dataclass
 class TPLinkEnterpriseRouterSensorEntityDescription(
     SensorEntityDescription, TPLinkEnterpriseRouterSensorRequiredKeysMixin
 ):
-    pass
+    """ Status groups the value and attributes come from, empty for every update """
+    groups: tuple[str, ...] = ()
+
+
+def host_dicts(hosts, exclude=(), limit: int | None = None) -> list[dict]:
+    return [host.as_dict(exclude) for host in islice(hosts, limit)]
+
+
+def bounded_list(name: str, items, limit: int | None, convert=list) -> dict:
+    """ The whole list, its first `limit` entries or, with a limit of 0, nothing """
+    if limit == 0:
+        return {}
+
+    attrs = {name: convert(islice(items, limit))}
+    if limit is not None and len(items) > limit:
+        attrs[f"{name}_truncated"] = True
+
+    return attrs
+
+
+def host_list(name: str, hosts, limit: int | None, exclude=()) -> dict:
+    return bounded_list(name, hosts, limit, lambda window: host_dicts(window, exclude))
+
+
+def ap_connected_hosts(status, limit: int | None) -> dict:
+    """ The limit counts hosts of all APs together, ap_host_count keeps the per AP totals """
+    if limit == 0:
+        return {}
+
+    ap_hosts = {}
+    remaining = limit
+    for ap_name, hosts in status['ap_connected_hosts'].items():
+        if remaining is not None and remaining <= 0:
+            break
+        ap_hosts[ap_name] = host_dicts(hosts, (), remaining)
+        if remaining is not None:
+            remaining -= len(ap_hosts[ap_name])
+
+    attrs = {"ap_connected_hosts": ap_hosts}
+    if limit is not None and sum(map(len, status['ap_connected_hosts'].values())) > limit:
+        attrs["ap_connected_hosts_truncated"] = True
+
+    return attrs
+
+
+def metric(status, name: str) -> dict:
+    return status.get('metrics', {}).get(name) or {}
+
+
+def timing_sensor(key: str, name: str, metric_name: str) -> TPLinkEnterpriseRouterSensorEntityDescription:
+    return TPLinkEnterpriseRouterSensorEntityDescription(
+        key=key,
+        name=name,
+        translation_key=key,
+        icon="mdi:timer-outline",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        suggested_display_precision=1,
+        value=lambda status: metric(status, metric_name).get('p50'),
+        attrs=lambda status, limit: metric(status, metric_name),
+    )
 
 
 SENSOR_TYPES: tuple[TPLinkEnterpriseRouterSensorEntityDescription, ...] = (
     TPLinkEnterpriseRouterSensorEntityDescription(
         key="wireless_clients_total",
+        groups=("hosts",),
         name="Total Wireless Clients",
         translation_key="wireless_clients_total",
         icon="mdi:access-point-network",
         state_class=SensorStateClass.TOTAL,
         value=lambda status: status['wireless_host_count'],
-        attrs=lambda status: {
-            "hosts": status['wireless_hosts'],
-            "ap_connected_hosts": status['ap_connected_hosts'],
+        attrs=lambda status, limit: {
+            **host_list("hosts", status['wireless_hosts'], limit, ("type",)),
+            **ap_connected_hosts(status, limit),
+            "ap_host_count": {ap_name: len(hosts) for ap_name, hosts in status['ap_connected_hosts'].items()},
+            "frequency_host_count": status['frequency_host_count'],
         }
     ),
     TPLinkEnterpriseRouterSensorEntityDescription(
         key="wired_clients_total",
+        groups=("hosts",),
         name="Total Wired Clients",
         translation_key="wired_clients_total",
         icon="mdi:cable-data",
         state_class=SensorStateClass.TOTAL,
         value=lambda status: status['wired_host_count'],
-        attrs=lambda status: {
-            "hosts": status['wired_hosts'],
+        attrs=lambda status, limit: {
+            **host_list("hosts", status['wired_hosts'], limit, ("type",)),
         }
     ),
     TPLinkEnterpriseRouterSensorEntityDescription(
         key="clients_total",
+        groups=("hosts",),
         name="Total Clients",
         translation_key="clients_total",
         icon="mdi:account-multiple",
         state_class=SensorStateClass.TOTAL,
         value=lambda status: status['host_count'],
-        attrs=lambda status: {
-            "hosts": status['hosts'],
+        attrs=lambda status, limit: {
+            **host_list("hosts", status['hosts'], limit),
             "ssid_host_count": status['ssid_host_count'],
         }
     ),
@@ -76,7 +144,7 @@ SENSOR_TYPES: tuple[TPLinkEnterpriseRouterSensorEntityDescription, ...] = (
         native_unit_of_measurement=PERCENTAGE,
         suggested_display_precision=1,
         value=lambda status: status['cpu_used'],
-        attrs=lambda status: {}
+        attrs=lambda status, limit: {}
     ),
     TPLinkEnterpriseRouterSensorEntityDescription(
         key="memory_used",
@@ -87,7 +155,7 @@ SENSOR_TYPES: tuple[TPLinkEnterpriseRouterSensorEntityDescription, ...] = (
         native_unit_of_measurement=PERCENTAGE,
         suggested_display_precision=1,
         value=lambda status: status['memory_used'],
-        attrs=lambda status: {}
+        attrs=lambda status, limit: {}
     ),
     TPLinkEnterpriseRouterSensorEntityDescription(
         key="wan_count",
@@ -95,36 +163,97 @@ SENSOR_TYPES: tuple[TPLinkEnterpriseRouterSensorEntityDescription, ...] = (
         translation_key="wan_count",
         icon="mdi:wan",
         value=lambda status: status['wan_count'],
-        attrs=lambda status: {}
+        attrs=lambda status, limit: {}
     ),
     TPLinkEnterpriseRouterSensorEntityDescription(
         key="ap_count",
+        groups=("aps",),
         name="AP Count",
         translation_key="ap_count",
         icon="mdi:access-point",
         value=lambda status: status['ap_count'],
-        attrs=lambda status: {
-            "list": status['ap_list'],
+        attrs=lambda status, limit: {
+            **bounded_list("list", status['ap_list'], limit),
         }
     ),
     TPLinkEnterpriseRouterSensorEntityDescription(
         key="ap_online_count",
+        groups=("aps",),
         name="AP Online Count",
         translation_key="ap_online_count",
         icon="mdi:access-point-check",
         value=lambda status: status['ap_online_count'],
-        attrs=lambda status: {
-            "list": status['ap_online_list'],
+        attrs=lambda status, limit: {
+            **bounded_list("list", status['ap_online_list'], limit),
         }
     ),
 TPLinkEnterpriseRouterSensorEntityDescription(
         key="ap_offline_count",
+        groups=("aps",),
         name="AP Offline Count",
         translation_key="ap_offline_count",
         icon="mdi:access-point-remove",
         value=lambda status: status['ap_offline_count'],
-        attrs=lambda status: {
-            "list": status['ap_offline_list'],
+        attrs=lambda status, limit: {
+            **bounded_list("list", status['ap_offline_list'], limit),
+        }
+    ),
+    timing_sensor("request_latency", "Request Latency", "request"),
+    timing_sensor("decode_time", "Decode Time", "decode"),
+    timing_sensor("process_time", "Process Time", "process"),
+    timing_sensor("entity_update_time", "Entity Update Time", "entity_update"),
+    TPLinkEnterpriseRouterSensorEntityDescription(
+        key="response_size",
+        name="Response Size",
+        translation_key="response_size",
+        icon="mdi:download-network",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        value=lambda status: metric(status, 'response_bytes').get('p50'),
+        attrs=lambda status, limit: metric(status, 'response_bytes'),
+    ),
+    TPLinkEnterpriseRouterSensorEntityDescription(
+        key="login_count",
+        name="Login Count",
+        translation_key="login_count",
+        icon="mdi:login",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value=lambda status: status.get('metrics', {}).get('logins', 0),
+        attrs=lambda status, limit: {}
+    ),
+    TPLinkEnterpriseRouterSensorEntityDescription(
+        key="merged_fetches",
+        name="Merged Fetches",
+        translation_key="merged_fetches",
+        icon="mdi:call-merge",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value=lambda status: status.get('metrics', {}).get('merged_fetches', 0),
+        attrs=lambda status, limit: {}
+    ),
+    TPLinkEnterpriseRouterSensorEntityDescription(
+        key="syslog_tracking_size",
+        name="Syslog Tracking Size",
+        translation_key="syslog_tracking_size",
+        icon="mdi:text-box-search-outline",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        state_class=SensorStateClass.MEASUREMENT,
+        value=lambda status: status.get('syslog', {}).get('tracking_size', 0),
+        attrs=lambda status, limit: status.get('syslog', {}),
+    ),
+    TPLinkEnterpriseRouterSensorEntityDescription(
+        key="request_errors",
+        name="Request Errors",
+        translation_key="request_errors",
+        icon="mdi:alert-circle-outline",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value=lambda status: status.get('metrics', {}).get('errors', 0),
+        attrs=lambda status, limit: {
+            "circuit_open_rejections": status.get('metrics', {}).get('circuit_open_rejections', 0),
+            "stale": status.get('stale', False),
         }
     ),
 )
@@ -152,18 +281,19 @@ async def async_setup_entry(
                 translation_key=f"wan_{key}_state",
                 icon="mdi:wan",
                 value=lambda status: wan_state.get("state"),
-                attrs=lambda status: {}
+                attrs=lambda status, limit: {}
             ),
         ))
 
     async_add_entities(sensors, False)
 
 
-class TPLinkEnterpriseRouterSensor(
-    CoordinatorEntity[TPLinkEnterpriseRouterCoordinator], SensorEntity
-):
+class TPLinkEnterpriseRouterSensor(TPLinkEnterpriseRouterEntity, SensorEntity):
     entity_description: TPLinkEnterpriseRouterSensorEntityDescription
 
+    """ Lists can be hundreds of KB, keep them out of the recorder, get_list serves them on demand """
+    _unrecorded_attributes = frozenset({"hosts", "ap_connected_hosts", "list"})
+
     def __init__(
             self,
             coordinator: TPLinkEnterpriseRouterCoordinator,
@@ -177,11 +307,24 @@ class TPLinkEnterpriseRouterSensor(
         self.entity_description = description
         self._attr_has_entity_name = True
         self._attr_native_value = self.entity_description.value(self.coordinator.status)
-        self._attr_extra_state_attributes = self.entity_description.attrs(self.coordinator.status)
+        self._attr_extra_state_attributes = self.entity_description.attrs(
+            self.coordinator.status, self.coordinator.attribute_limit
+        )
+
+    def _state_fingerprint(self) -> tuple:
+        return self._attr_native_value, self._attr_extra_state_attributes
 
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
+        groups = self.entity_description.groups
+        if groups and self.coordinator.polled_groups.isdisjoint(groups):
+            """ Nothing this sensor shows was fetched, availability may still have changed """
+            self.async_write_ha_state_if_changed()
+            return
+
         self._attr_native_value = self.entity_description.value(self.coordinator.status)
-        self._attr_extra_state_attributes = self.entity_description.attrs(self.coordinator.status)
-        self.async_write_ha_state()
+        self._attr_extra_state_attributes = self.entity_description.attrs(
+            self.coordinator.status, self.coordinator.attribute_limit
+        )
+        self.async_write_ha_state_if_changed()
@@ -0,0 +1,51 @@
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+
+from .const import DOMAIN, PAGED_LISTS, SERVICE_GET_LIST
+from .coordinator import TPLinkEnterpriseRouterCoordinator
+
+GET_LIST_SCHEMA = vol.Schema({
+    vol.Required("config_entry_id"): cv.string,
+    vol.Required("list"): vol.In(PAGED_LISTS),
+    vol.Optional("ap_name"): cv.string,
+    vol.Optional("page", default=1): vol.All(vol.Coerce(int), vol.Range(min=1)),
+    vol.Optional("page_size", default=100): vol.All(vol.Coerce(int), vol.Range(min=1, max=1000)),
+})
+
+
+def async_register_services(hass: HomeAssistant) -> None:
+    if hass.services.has_service(DOMAIN, SERVICE_GET_LIST):
+        return
+
+    async def get_list(call: ServiceCall) -> ServiceResponse:
+        """ Page through a host or AP list that sensors keep out of their attributes """
+        """ hass.data[DOMAIN] also holds shared state next to the coordinators """
+        coordinator = hass.data.get(DOMAIN, {}).get(call.data["config_entry_id"])
+        if not isinstance(coordinator, TPLinkEnterpriseRouterCoordinator):
+            raise ServiceValidationError(f"Unknown config entry: {call.data['config_entry_id']}")
+
+        items = coordinator.status.get(call.data["list"], [])
+        if call.data["list"] == "ap_connected_hosts":
+            if "ap_name" not in call.data:
+                raise ServiceValidationError("ap_name is required for ap_connected_hosts")
+            items = items.get(call.data["ap_name"], [])
+
+        page_size = call.data["page_size"]
+        start = (call.data["page"] - 1) * page_size
+
+        return {
+            "total": len(items),
+            "page": call.data["page"],
+            "page_size": page_size,
+            "items": [
+                item.as_dict() if hasattr(item, "as_dict") else item
+                for item in items[start:start + page_size]
+            ],
+        }
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_GET_LIST, get_list, schema=GET_LIST_SCHEMA, supports_response=SupportsResponse.ONLY
+    )
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from typing import NamedTuple
+
+CURSOR_FOUND = "found"
+CURSOR_NEED_MORE = "need_more"
+CURSOR_LOST = "lost"
+
+
+class SyslogCursor(NamedTuple):
+    """Newest line handled so far, identical lines in the same second are told apart by ordinal."""
+
+    timestamp: str
+    digest: int
+    """ Position of the line among the lines of its second, counted from the oldest """
+    ordinal: int
+
+
+def line_timestamp(line: str) -> str:
+    """ Router log format, <severity>YYYY-MM-DD HH:MM:SS[scope]message """
+    return line[3:22]
+
+
+def join_pages(pages: list[list[str]], page_size: int, totals: list[int] | None = None) -> list[str]:
+    """
+    Concatenate newest first pages by position. totals are the router's line counts at each read,
+    lines logged after the first read push the later pages down by as many lines, those are dropped.
+    Text can't tell, a run of identical lines looks like an overlap.
+    """
+    lines = []
+
+    for index, page in enumerate(pages):
+        shift = 0
+        if totals and totals[0] and totals[index]:
+            shift = max(0, totals[index] - totals[0])
+
+        start = index * page_size - shift
+        lines.extend(page[max(0, len(lines) - start):])
+
+    return lines
+
+
+def build_cursor(lines: list[str]) -> SyslogCursor | None:
+    """ Cursor at the newest line of a newest first list """
+    if not lines:
+        return None
+
+    timestamp = line_timestamp(lines[0])
+    ordinal = 0
+    for line in lines:
+        if line_timestamp(line) != timestamp:
+            break
+        ordinal += 1
+
+    return SyslogCursor(timestamp, hash(lines[0]), ordinal)
+
+
+def find_new_lines(lines: list[str], cursor: SyslogCursor, exhausted: bool) -> tuple[list[str], str]:
+    """
+    Lines newer than the cursor, newest first, and whether the cursor was found.
+    exhausted means lines reaches the end of the router buffer.
+    """
+    new_lines = []
+    group = []
+
+    for line in lines:
+        timestamp = line_timestamp(line)
+
+        if timestamp > cursor.timestamp:
+            new_lines.append(line)
+        elif timestamp == cursor.timestamp:
+            group.append(line)
+        else:
+            break
+    else:
+        """ The cursor's second may continue on the next page """
+        if not exhausted:
+            return new_lines, CURSOR_NEED_MORE
+
+    """ The oldest `ordinal` lines of the cursor's second were handled already """
+    unseen = len(group) - cursor.ordinal
+    if unseen < 0 or hash(group[unseen]) != cursor.digest:
+        return new_lines + group, CURSOR_LOST
+
+    return new_lines + group[:unseen], CURSOR_FOUND
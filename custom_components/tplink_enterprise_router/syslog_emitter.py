@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import time
+from collections import Counter
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN
+
+
+class TokenBucket:
+    """Allow `rate` events per second on average and bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self, now: float | None = None) -> bool:
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens < 1:
+            return False
+
+        self.tokens -= 1
+        return True
+
+
+class SyslogEmitter:
+    """Fire the bus events of matched syslog lines, rate limited per type and optionally batched."""
+
+    def __init__(self, hass: HomeAssistant, rate: float = 0, burst: float = 0, batch_interval: float = 0):
+        self.hass = hass
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.batch_interval = batch_interval
+        self.buckets: dict[str, TokenBucket] = {}
+        self.pending: list[dict] = []
+        self._flush_handle = None
+        self.emitted = Counter()
+        self.dropped = Counter()
+        self.coalesced = Counter()
+
+    @callback
+    def emit(self, event_type: str, events: list[tuple[str, dict]]) -> None:
+        """ events are the bus events of one matched line, they pass or drop together """
+        if self.rate > 0:
+            bucket = self.buckets.get(event_type)
+            if bucket is None:
+                bucket = self.buckets[event_type] = TokenBucket(self.rate, self.burst)
+
+            if not bucket.take():
+                self.dropped[event_type] += 1
+                return
+
+        if self.batch_interval <= 0:
+            for name, data in events:
+                self.hass.bus.async_fire(name, data)
+            self.emitted[event_type] += 1
+            return
+
+        """ Collect until the interval ends, then fire one event for all of them """
+        self.pending.extend({"event_type": name, **data} for name, data in events)
+        self.coalesced[event_type] += 1
+
+        if self._flush_handle is None:
+            self._flush_handle = self.hass.loop.call_later(self.batch_interval, self.flush)
+
+    @callback
+    def flush(self) -> None:
+        self._flush_handle = None
+
+        if not self.pending:
+            return
+
+        events, self.pending = self.pending, []
+        self.hass.bus.async_fire(f"{DOMAIN}_syslog_batch", {"count": len(events), "events": events})
+
+    @callback
+    def close(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+        self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "events_emitted": sum(self.emitted.values()),
+            "events_dropped": sum(self.dropped.values()),
+            "events_coalesced": sum(self.coalesced.values()),
+            "events_dropped_by_type": dict(self.dropped),
+        }
@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+from collections import Counter
+from datetime import datetime, timedelta
+
+from homeassistant.core import Event, HomeAssistant
+
+from .const import (
+    DATA_SYSLOG_BUS_ROUTERS,
+    DATA_SYSLOG_LISTENERS,
+    DOMAIN,
+    SYSLOG_MAX_REPORTED_SOURCES,
+    SYSLOG_QUEUE_SIZE,
+)
+from .syslog_tracker import SyslogTracker
+
+_LOGGER = logging.getLogger(__name__)
+
+""" <PRI>Mmm dd hh:mm:ss HOSTNAME TAG[PID]: MSG """
+RFC3164_PATTERN = re.compile(
+    r"<(?P<pri>\d{1,3})>(?P<timestamp>[A-Z][a-z]{2} [ \d]\d \d\d:\d\d:\d\d) "
+    r"(?:(?P<hostname>\S+) )?(?P<tag>[^\s:\[]+)(?:\[\d+\])?: ?(?P<message>.*)",
+    re.DOTALL,
+)
+""" <PRI>YYYY-MM-DD hh:mm:ss[SCOPE]MSG, the format the router shows in its own log """
+ROUTER_PATTERN = re.compile(
+    r"<(?P<pri>\d{1,3})>(?P<timestamp>\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)\[(?P<tag>[^\]]+)\](?P<message>.*)",
+    re.DOTALL,
+)
+""" ... TAG: LEVEL - YYYY-MM-DD hh:mm:ss <SEVERITY> : MSG behind any header, the format SyslogTracker.get_event_data reads """
+TPLINK_PATTERN = re.compile(
+    r"(?P<tag>[^\s:]+): \S+ - (?P<timestamp>\d{4}-\d\d-\d\d \d\d:\d\d:\d\d) <(?P<severity>\d)> : (?P<message>.*)",
+    re.DOTALL,
+)
+
+
+def parse_syslog_line(line: str, source_ip: str, now: datetime | None = None) -> tuple[dict, bool] | None:
+    """ Event data for SyslogTracker.handle_event_data and whether it is a wireless station line """
+    if found := ROUTER_PATTERN.match(line):
+        timestamp = found["timestamp"]
+        severity = int(found["pri"]) % 8
+    elif found := TPLINK_PATTERN.search(line.replace("  ", " ")):
+        timestamp = found["timestamp"]
+        severity = int(found["severity"])
+    elif found := RFC3164_PATTERN.match(line):
+        """ No year in RFC3164, a date ahead of now belongs to last year """
+        now = now or datetime.now()
+        parsed = datetime.strptime(f"{now.year} {found['timestamp']}", "%Y %b %d %H:%M:%S")
+        if parsed > now + timedelta(days=1):
+            parsed = parsed.replace(year=now.year - 1)
+        timestamp = parsed.strftime("%Y-%m-%d %H:%M:%S")
+        severity = int(found["pri"]) % 8
+    else:
+        return None
+
+    event_data = {
+        "message": found["message"].strip().replace("  ", " "),
+        "source_ip": source_ip,
+        "severity": severity,
+        "timestamp": timestamp,
+    }
+
+    return event_data, found["tag"].lower() == "wstation"
+
+
+class SourceRoutes:
+    """Trackers by router address, entries pointing at the same router each get the line."""
+
+    def __init__(self):
+        self.routes: dict[str, list[SyslogTracker]] = {}
+        self.unrouted = 0
+        self._reported_sources: set[str] = set()
+
+    def add_route(self, source_ip: str, tracker: SyslogTracker) -> None:
+        self.routes.setdefault(source_ip, []).append(tracker)
+
+    def remove_route(self, source_ip: str, tracker: SyslogTracker) -> None:
+        trackers = self.routes.get(source_ip, [])
+        if tracker in trackers:
+            trackers.remove(tracker)
+        if not trackers:
+            self.routes.pop(source_ip, None)
+
+    def count_unrouted(self, source_ip) -> None:
+        """ Say once per address why its lines go nowhere, a router may log from another interface """
+        self.unrouted += 1
+
+        if source_ip not in self._reported_sources and len(self._reported_sources) < SYSLOG_MAX_REPORTED_SOURCES:
+            self._reported_sources.add(source_ip)
+            _LOGGER.warning(
+                "Ignoring syslog lines from %s, no router is configured with that address (routers: %s)",
+                source_ip, ", ".join(self.routes),
+            )
+
+
+class SyslogProtocol(asyncio.DatagramProtocol):
+    def __init__(self, listener: SyslogListener):
+        self.listener = listener
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        self.listener.enqueue(data, addr[0])
+
+    def error_received(self, exc: Exception) -> None:
+        _LOGGER.debug("Syslog listener error: %s", exc)
+
+
+class SyslogListener(SourceRoutes):
+    """UDP syslog endpoint shared by the entries listening on one port, lines are routed by source IP."""
+
+    def __init__(self, hass: HomeAssistant, port: int, queue_size: int = SYSLOG_QUEUE_SIZE):
+        super().__init__()
+        self.hass = hass
+        self.port = port
+        self.queue: asyncio.Queue[tuple[bytes, str]] = asyncio.Queue(maxsize=queue_size)
+        self.transport = None
+        self._worker: asyncio.Task | None = None
+        self.received = 0
+        self.malformed = 0
+        self.dropped = Counter()
+
+    async def async_start(self) -> None:
+        self.transport, _ = await self.hass.loop.create_datagram_endpoint(
+            lambda: SyslogProtocol(self), local_addr=("0.0.0.0", self.port)
+        )
+        self._worker = self.hass.async_create_background_task(
+            self._async_consume(), f"{DOMAIN}_syslog_listener_{self.port}"
+        )
+
+    def close(self) -> None:
+        if self.transport is not None:
+            self.transport.close()
+        if self._worker is not None:
+            self._worker.cancel()
+
+    def enqueue(self, data: bytes, source_ip: str) -> None:
+        """ Never block the socket, count what does not fit """
+        self.received += 1
+        try:
+            self.queue.put_nowait((data, source_ip))
+        except asyncio.QueueFull:
+            self.dropped[source_ip] += 1
+
+    async def _async_consume(self) -> None:
+        while True:
+            data, source_ip = await self.queue.get()
+
+            trackers = self.routes.get(source_ip)
+            if not trackers:
+                self.count_unrouted(source_ip)
+                continue
+
+            parsed = parse_syslog_line(data.decode("utf-8", "replace").strip(), source_ip)
+            if parsed is None:
+                self.malformed += 1
+                continue
+
+            for tracker in trackers:
+                try:
+                    await tracker.handle_event_data(*parsed)
+                except Exception as e:
+                    _LOGGER.warning("Fail to handle syslog line from %s: %s", source_ip, e)
+
+    def stats(self, source_ip: str) -> dict:
+        return {
+            "listener_received": self.received,
+            "listener_dropped": self.dropped[source_ip],
+            "listener_unrouted": self.unrouted,
+            "listener_malformed": self.malformed,
+            "listener_queue": self.queue.qsize(),
+        }
+
+
+async def async_get_syslog_listener(hass: HomeAssistant, port: int) -> SyslogListener:
+    """ One socket per port, entries on the same port share it """
+    listeners = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_SYSLOG_LISTENERS, {})
+
+    if port not in listeners:
+        listener = SyslogListener(hass, port)
+        await listener.async_start()
+        listeners[port] = listener
+
+    return listeners[port]
+
+
+def release_syslog_listener(hass: HomeAssistant, listener: SyslogListener, tracker: SyslogTracker) -> None:
+    """ Close the socket once no entry routes to it """
+    listener.remove_route(tracker.source_ip, tracker)
+
+    if not listener.routes:
+        listener.close()
+        hass.data[DOMAIN].get(DATA_SYSLOG_LISTENERS, {}).pop(listener.port, None)
+
+
+class SyslogBusRouter(SourceRoutes):
+    """One bus listener per syslog event name, each line is parsed once and handed to its router's trackers."""
+
+    def __init__(self, hass: HomeAssistant, event_type: str):
+        super().__init__()
+        self.hass = hass
+        self.event_type = event_type
+        self._remove_listener = hass.bus.async_listen(event_type, self._async_handle)
+
+    def close(self) -> None:
+        self._remove_listener()
+
+    async def _async_handle(self, event: Event) -> None:
+        trackers = self.routes.get(event.data.get("source_ip"))
+
+        """ A lone router gets every line, the receiver may see it behind another address """
+        if trackers is None and len(self.routes) == 1:
+            trackers = next(iter(self.routes.values()))
+
+        if not trackers:
+            self.count_unrouted(event.data.get("source_ip"))
+            return
+
+        event_data = SyslogTracker.get_event_data(event)
+        trackable = SyslogTracker.should_track(event)
+        for tracker in trackers:
+            await tracker.handle_event_data(event_data, trackable)
+
+
+def get_syslog_bus_router(hass: HomeAssistant, event_type: str) -> SyslogBusRouter:
+    routers = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_SYSLOG_BUS_ROUTERS, {})
+
+    if event_type not in routers:
+        routers[event_type] = SyslogBusRouter(hass, event_type)
+
+    return routers[event_type]
+
+
+def release_syslog_bus_router(hass: HomeAssistant, router: SyslogBusRouter, tracker: SyslogTracker) -> None:
+    """ Stop listening once no entry routes to it """
+    router.remove_route(tracker.source_ip, tracker)
+
+    if not router.routes:
+        router.close()
+        hass.data[DOMAIN].get(DATA_SYSLOG_BUS_ROUTERS, {}).pop(router.event_type, None)
@@ -1,25 +1,61 @@
+from __future__ import annotations
+
+import asyncio
 import logging
+import math
+import socket
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
 from urllib.parse import unquote
-from datetime import datetime, timedelta
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import Event, HomeAssistant
 from homeassistant.helpers import translation
 
 from custom_components.tplink_enterprise_router.client import TPLinkEnterpriseRouterClient
-from custom_components.tplink_enterprise_router.const import DOMAIN
+from custom_components.tplink_enterprise_router.const import (
+    DOMAIN,
+    SYSLOG_MAX_CATCHUP_PAGES,
+    SYSLOG_MAX_PAGE_SIZE,
+    SYSLOG_MIN_PAGE_SIZE,
+    SYSLOG_PAGE_HEADROOM,
+    TRACKING_CACHE_SIZE,
+    TRACKING_CACHE_TTL,
+)
+from .syslog_cursor import CURSOR_FOUND, CURSOR_LOST, CURSOR_NEED_MORE, build_cursor, find_new_lines, join_pages
+from .syslog_emitter import SyslogEmitter
 
 _LOGGER = logging.getLogger(__name__)
 
+TRACKED_EVENT_TYPES = frozenset({
+    "wireless_client_disconnected",
+    "wireless_client_connected",
+    "wireless_client_roamed",
+})
+
 
 class EventMatcher:
+    """ Text that identifies the message, SyslogTracker dispatches on it """
+    keyword: str = None
+
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry, severities: list, _type: str):
         self.hass = hass
         self.entry = entry
         self.severities = severities
         self.type = _type
         self.translations = None
+        """ Set by SyslogTracker """
+        self.emitter: SyslogEmitter | None = None
 
     async def process(self, event: dict) -> bool:
+        message = event['message']
+        if not self.match(message):
+            return False
+
+        return await self.process_matched(event, message.split(" "))
+
+    async def process_matched(self, event: dict, segments: list) -> bool:
+        """ The message is known to match, segments is the message split on spaces """
         if self.translations is None:
             self.translations = await translation.async_get_translations(
                 self.hass,
@@ -31,11 +67,7 @@ class EventMatcher:
         if event['severity'] not in self.severities:
             return False
 
-        message = event['message']
-        if not self.match(message):
-            return False
-
-        matched_object = self.parse(event)
+        matched_object = self.parse(event, segments)
 
         if matched_object is None:
             return False
@@ -54,21 +86,29 @@ class EventMatcher:
         return ""
 
     def match(self, message: str) -> bool:
-        raise NotImplementedError()
+        return self.keyword in message
 
-    def parse(self, event: dict):
+    def parse(self, event: dict, segments: list):
         raise NotImplementedError()
 
     def _process(self, data) -> None:
+        self.emitter.emit(self.type, self.build_events(data))
+
+    def build_events(self, data) -> list[tuple[str, dict]]:
+        """ Bus events of one matched line as (event type, data) """
         final_data = {
             **data,
             "type": self.type,
         }
-        self.hass.bus.fire(f"{DOMAIN}_{self.type}", final_data)
-        self.hass.bus.fire(f"{DOMAIN}_syslog", final_data)
+        return [
+            (f"{DOMAIN}_{self.type}", final_data),
+            (f"{DOMAIN}_syslog", final_data),
+        ]
 
 
 class WebLoginEventMatcher(EventMatcher):
+    keyword = "成功登录设备Web管理系统"
+
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry):
         super().__init__(
             hass,
@@ -84,11 +124,7 @@ class WebLoginEventMatcher(EventMatcher):
 
         super()._process(data)
 
-    def match(self, message: str) -> bool:
-        return "成功登录设备Web管理系统" in message
-
-    def parse(self, event: dict):
-        segments = event['message'].split(" ")
+    def parse(self, event: dict, segments: list):
         _seg = segments[0].replace("(IP:", " ").replace(")", "").split(" ")
 
         return {
@@ -100,8 +136,8 @@ class WebLoginEventMatcher(EventMatcher):
 
 
 class WirelessClientChangedEventMatcher(EventMatcher):
-    def _process(self, data) -> None:
-        super()._process(data)
+    def build_events(self, data) -> list[tuple[str, dict]]:
+        events = super().build_events(data)
         final_data = None
         if self.type == "wireless_client_roamed":
             final_data = {
@@ -138,14 +174,18 @@ class WirelessClientChangedEventMatcher(EventMatcher):
                 "current_status": "disconnected",
                 "type": self.type,
             }
-        self.hass.bus.fire(f"{DOMAIN}_wireless_client_changed", final_data)
-        self.hass.bus.fire(f"{DOMAIN}_syslog", {
-            **final_data,
-            "type": "wireless_client_changed",
-        })
+        return events + [
+            (f"{DOMAIN}_wireless_client_changed", final_data),
+            (f"{DOMAIN}_syslog", {
+                **final_data,
+                "type": "wireless_client_changed",
+            }),
+        ]
 
 
 class WirelessClientRoamedEventMatcher(WirelessClientChangedEventMatcher):
+    keyword = "成功漫游到AP"
+
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry):
         super().__init__(
             hass,
@@ -154,12 +194,7 @@ class WirelessClientRoamedEventMatcher(WirelessClientChangedEventMatcher):
             "wireless_client_roamed"
         )
 
-    def match(self, message: str) -> bool:
-        return "成功漫游到AP" in message
-
-    def parse(self, event: dict):
-        segments = event['message'].split(" ")
-
+    def parse(self, event: dict, segments: list):
         previous_ssid_groups = segments[3].replace(")", "(").split("(")
         current_ssid_groups = segments[6].replace(")", "(").split("(")
 
@@ -177,6 +212,8 @@ class WirelessClientRoamedEventMatcher(WirelessClientChangedEventMatcher):
 
 
 class WirelessClientConnectedEventMatcher(WirelessClientChangedEventMatcher):
+    keyword = "成功连接到AP"
+
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry):
         super().__init__(
             hass,
@@ -185,12 +222,7 @@ class WirelessClientConnectedEventMatcher(WirelessClientChangedEventMatcher):
             "wireless_client_connected"
         )
 
-    def match(self, message: str) -> bool:
-        return "成功连接到AP" in message
-
-    def parse(self, event: dict):
-        segments = event['message'].split(" ")
-
+    def parse(self, event: dict, segments: list):
         ssid_groups = segments[5].split("(")
 
         return {
@@ -206,6 +238,8 @@ class WirelessClientConnectedEventMatcher(WirelessClientChangedEventMatcher):
 
 
 class WirelessClientDisconnectedEventMatcher(WirelessClientChangedEventMatcher):
+    keyword = "断开连接."
+
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry):
         super().__init__(
             hass,
@@ -214,12 +248,7 @@ class WirelessClientDisconnectedEventMatcher(WirelessClientChangedEventMatcher):
             "wireless_client_disconnected"
         )
 
-    def match(self, message: str) -> bool:
-        return "断开连接." in message
-
-    def parse(self, event: dict):
-        segments = event['message'].split(" ")
-
+    def parse(self, event: dict, segments: list):
         return {
             "source_ip": event['source_ip'],
             "timestamp": event['timestamp'],
@@ -228,6 +257,8 @@ class WirelessClientDisconnectedEventMatcher(WirelessClientChangedEventMatcher):
 
 
 class DHCPIpAssignedEventMatcher(EventMatcher):
+    keyword = "分配了IP地址"
+
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry):
         super().__init__(
             hass, entry,
@@ -235,12 +266,7 @@ class DHCPIpAssignedEventMatcher(EventMatcher):
             "dhcp_ip_assigned"
         )
 
-    def match(self, message: str) -> bool:
-        return "分配了IP地址" in message
-
-    def parse(self, event: dict):
-        segments = event['message'].split(" ")
-
+    def parse(self, event: dict, segments: list):
         return {
             "source_ip": event['source_ip'],
             "timestamp": event['timestamp'],
@@ -249,6 +275,90 @@ class DHCPIpAssignedEventMatcher(EventMatcher):
         }
 
 
+class SlidingWindowCounter:
+    """Count events per key over the last `window` seconds, of monotonic time unless the caller passes its own clock."""
+
+    def __init__(self, window: float):
+        self.window = window
+        """ Ordered by last event, the least recently active key comes first """
+        self.events: OrderedDict[object, deque] = OrderedDict()
+
+    def add(self, key, now: float | None = None) -> int:
+        """ Record an event and return how many the key has inside the window """
+        now = time.monotonic() if now is None else now
+        horizon = now - self.window
+        self._expire_idle(horizon)
+
+        times = self.events.get(key)
+        if times is None:
+            times = self.events[key] = deque()
+        else:
+            self.events.move_to_end(key)
+
+        times.append(now)
+        while times[0] < horizon:
+            times.popleft()
+
+        return len(times)
+
+    def _expire_idle(self, horizon: float) -> None:
+        """ Drop keys whose newest event already left the window """
+        while self.events:
+            key, times = next(iter(self.events.items()))
+            if times[-1] >= horizon:
+                return
+            del self.events[key]
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+
+class TrackingCache:
+    """Newest event per key, bounded in size (least recently written first out) and age."""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        """ key -> (written at, event), ordered by write """
+        self.entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self.lru_evictions = 0
+        self.ttl_evictions = 0
+
+    def get(self, key: str, now: float | None = None) -> dict | None:
+        now = time.monotonic() if now is None else now
+        entry = self.entries.get(key)
+
+        if entry is None:
+            return None
+
+        if now - entry[0] > self.ttl:
+            del self.entries[key]
+            self.ttl_evictions += 1
+            return None
+
+        return entry[1]
+
+    def set(self, key: str, event: dict, now: float | None = None) -> None:
+        now = time.monotonic() if now is None else now
+        self.entries[key] = (now, event)
+        self.entries.move_to_end(key)
+
+        """ Oldest writes are at the front, expire them before trimming to size """
+        while self.entries:
+            written_at, _ = next(iter(self.entries.values()))
+            if now - written_at <= self.ttl:
+                break
+            self.entries.popitem(last=False)
+            self.ttl_evictions += 1
+
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.lru_evictions += 1
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
 class SyslogTracker:
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry, client: TPLinkEnterpriseRouterClient):
         self.matchers = [
@@ -260,107 +370,240 @@ class SyslogTracker:
         ]
         self.hass = hass
         self.entry = entry
-        self.tracking_dict = {}
+        self.tracking_dict = TrackingCache(TRACKING_CACHE_SIZE, TRACKING_CACHE_TTL)
         self.client = client
         self.first_poll = entry.data.get("enable_syslog_poll_event", False)
-        self.last_log = None
-        self.source_ip = client.host.replace("http://", "").replace("https://", "")
-        self.unstable_tracking_list = []
+        self.cursor = None
+        self.page_size = SYSLOG_MIN_PAGE_SIZE
+        self.log_total = 0
+        self.log_rate = None
+        self.last_poll = None
+        self.pages_fetched = 0
+        self.buffer_wraps = 0
+        self.lost_events = 0
+        """ Bare address, syslog datagrams are routed on it """
+        self.source_ip = client.host.replace("http://", "").replace("https://", "").split("/")[0].split(":")[0]
+        self.listener = None
+        self.bus_router = None
+        self.unstable_check_count = entry.data.get("unstable_check_count", 5)
+        self.unstable_window = SlidingWindowCounter(entry.data.get("unstable_check_time", 60))
+        self.dispatch_table = tuple((matcher.keyword, matcher) for matcher in self.matchers)
+        self.emitter = SyslogEmitter(
+            hass,
+            entry.data.get("syslog_event_rate", 0),
+            entry.data.get("syslog_event_burst", 20),
+            entry.data.get("syslog_batch_interval", 0),
+        )
+        for matcher in self.matchers:
+            matcher.emitter = self.emitter
+
+    async def async_resolve_source_ip(self) -> None:
+        """ Route on the address datagrams come from, a host name never matches it """
+        try:
+            addresses = await self.hass.loop.getaddrinfo(self.source_ip, None, type=socket.SOCK_DGRAM)
+        except OSError as e:
+            _LOGGER.warning("Fail to resolve %s, syslog lines are routed on the name: %s", self.source_ip, e)
+            return
+
+        self.source_ip = addresses[0][4][0]
 
     async def handle(self, event):
-        event_data = SyslogTracker.get_event_data(event)
+        await self.handle_event_data(SyslogTracker.get_event_data(event), SyslogTracker.should_track(event))
+
+    async def handle_event_data(self, event_data: dict, trackable: bool):
+        """ event_data as built by get_event_data, trackable when the line comes from the wireless station scope """
+
+        """ Pick the matcher once, one split feeds the key and the parser """
+        matcher = self.find_matcher(event_data['message'])
+        event_type = matcher.type if matcher is not None else None
+        segments = event_data['message'].split(" ")
+
         """ Skip old log """
-        if SyslogTracker.should_track(event):
-            key = SyslogTracker.get_track_key(event_data)
+        key = SyslogTracker.get_track_key(event_type, segments)
+        if key is not None and trackable:
             old_tracking_data = self.tracking_dict.get(key)
 
             if old_tracking_data is not None and old_tracking_data['timestamp'] >= event_data['timestamp']:
                 return
 
-            self.tracking_dict[key] = event_data
+            self.tracking_dict.set(key, event_data)
 
         if self.first_poll:
             return
 
-        for matcher in self.matchers:
-            process_ok = await matcher.process(event_data)
-            if process_ok:
-                """ Check unstable log """
-                if isinstance(matcher, WirelessClientDisconnectedEventMatcher):
-                    # remove expired tracking dataw
-                    check_count = self.entry.data.get("unstable_check_count", 5)
-                    check_time = self.entry.data.get("unstable_check_time", 60)
-                    now = datetime.now()
-                    expired_time = (now - timedelta(seconds=check_time)).strftime("%Y-%m-%d %H:%M:%S")
-                    self.unstable_tracking_list = [
-                        item for item in self.unstable_tracking_list if item['timestamp'] >= expired_time
-                    ]
-
-                    # check
-                    key = SyslogTracker.get_track_key(event_data)
-                    self.unstable_tracking_list.append({
-                        "key": key,
-                        "timestamp": event_data['timestamp'],
-                    })
-                    count = sum([1 for item in self.unstable_tracking_list if item['key'] == key])
-
-                    if count >= check_count:
-                        segments = event_data['message'].split(" ")
-                        final_data = {
-                            "source_ip": event_data['source_ip'],
-                            "timestamp": event_data['timestamp'],
-                            "client_mac": segments[1][:17],
-                            "type": "unstable_wireless_client_detected",
-                        }
-                        self.hass.bus.async_fire(f"{DOMAIN}_unstable_wireless_client_detected", final_data)
-                        self.hass.bus.async_fire(f"{DOMAIN}_syslog", final_data)
+        if matcher is None:
+            return
 
-                return
+        process_ok = await matcher.process_matched(event_data, segments)
+        if process_ok:
+            """ Check unstable log """
+            if isinstance(matcher, WirelessClientDisconnectedEventMatcher):
+                key = SyslogTracker.get_track_key(event_type, segments)
+                count = self.unstable_window.add(key, SyslogTracker.line_time(event_data['timestamp']))
+
+                if count >= self.unstable_check_count:
+                    final_data = {
+                        "source_ip": event_data['source_ip'],
+                        "timestamp": event_data['timestamp'],
+                        "client_mac": segments[1][:17],
+                        "type": "unstable_wireless_client_detected",
+                    }
+                    self.emitter.emit("unstable_wireless_client_detected", [
+                        (f"{DOMAIN}_unstable_wireless_client_detected", final_data),
+                        (f"{DOMAIN}_syslog", final_data),
+                    ])
 
     async def poll(self):
-        json = await self.client.get_syslog(50)
-        _messages = [list(d.values())[0] for d in json.get("syslog", [])]
+        """ Read newest first pages until the cursor shows up, then handle the new lines oldest first """
+        now = time.monotonic()
+        previous_total = self.log_total
+        first_page, total = await self._read_log_page(1)
+        pages = [first_page]
+        totals = [total]
+        status = CURSOR_FOUND
+        new_lines = first_page
+        unread = 0
+
+        while self.cursor is not None:
+            lines = join_pages(pages, self.page_size, totals)
+            """ A short page is the end of the buffer when the router does not report its size """
+            exhausted = len(pages[-1]) < self.page_size or 0 < total <= len(pages) * self.page_size
+            new_lines, status = find_new_lines(lines, self.cursor, exhausted)
+
+            if status != CURSOR_NEED_MORE:
+                break
 
-        for message in _messages:
-            if self.last_log is not None and message == self.last_log:
+            """ Catch up, fetch the pages the log rate says are needed at once """
+            wanted = max(1, math.ceil((self._expected_lines(now) - len(lines)) / self.page_size))
+            last_page = min(math.ceil(total / self.page_size), SYSLOG_MAX_CATCHUP_PAGES) \
+                if total else SYSLOG_MAX_CATCHUP_PAGES
+            next_pages = range(len(pages) + 1, min(len(pages) + wanted, last_page) + 1)
+
+            if not next_pages:
+                """
+                Page limit reached, only lines newer than the cursor's second are known to be new,
+                the rest of that second and everything below it is left unread
+                """
+                unread = self._unread_new_lines(len(new_lines), total, previous_total, now)
                 break
 
-            severity = int(message[1:2])
+            for page_lines, page_total in await asyncio.gather(*(self._read_log_page(page) for page in next_pages)):
+                pages.append(page_lines)
+                totals.append(page_total)
+            self.pages_fetched += len(next_pages)
+
+        if status == CURSOR_LOST:
+            """ The router buffer wrapped past the cursor """
+            self.buffer_wraps += 1
+            self.lost_events += max(1, round(self._expected_lines(now)) - len(new_lines))
+        else:
+            self.lost_events += unread
+
+        for message in reversed(new_lines):
             await self.handle(
                 Event(
                     '',
                     {
-                        "message": unquote(message),
-                        "severity": severity,
+                        "message": message,
+                        "severity": int(message[1:2]),
                         "source_ip": self.source_ip
                     }
                 )
             )
 
-        self.last_log = _messages[0] if len(_messages) > 0 else self.last_log
+        self.cursor = build_cursor(join_pages(pages, self.page_size, totals)) or self.cursor
+        self._adapt_page_size(len(new_lines), now)
 
         if self.first_poll:
             self.first_poll = False
 
+    async def _read_log_page(self, page: int) -> tuple[list[str], int]:
+        """ Lines of the page and how many lines the router held when it answered, 0 when it doesn't say """
+        json = await self.client.get_syslog(self.page_size, page)
+        self.log_total = int(json.get("count", {}).get("syslog", 0))
+
+        return [unquote(list(d.values())[0]) for d in json.get("syslog", [])], self.log_total
+
+    def _expected_lines(self, now: float) -> float:
+        """ Lines the router likely logged since the last poll """
+        if self.log_rate is None or self.last_poll is None:
+            return 0
+
+        return self.log_rate * (now - self.last_poll)
+
+    def _unread_new_lines(self, handled: int, total: int, previous_total: int, now: float) -> int:
+        """
+        New lines left beyond the page limit. Exact while the buffer still grows, the older part
+        of it was handled already. Once it is full, estimated from the log rate.
+        """
+        if previous_total and total > previous_total:
+            newer = total - previous_total
+        else:
+            newer = round(self._expected_lines(now))
+
+        if total:
+            newer = min(newer, total)
+
+        return max(0, newer - handled)
+
+    def _adapt_page_size(self, new_line_count: int, now: float) -> None:
+        """ Track the log rate and size pages to hold a poll's worth of lines with headroom """
+        if self.last_poll is not None and now > self.last_poll:
+            rate = new_line_count / (now - self.last_poll)
+            self.log_rate = rate if self.log_rate is None else self.log_rate * 0.7 + rate * 0.3
+            self.page_size = min(SYSLOG_MAX_PAGE_SIZE, max(
+                SYSLOG_MIN_PAGE_SIZE, math.ceil(self.log_rate * (now - self.last_poll) * SYSLOG_PAGE_HEADROOM)
+            ))
+
+        self.last_poll = now
+
+    @staticmethod
+    def line_time(timestamp: str) -> float:
+        """
+        When the router logged the line, polled lines arrive in one batch per poll,
+        which may be further apart than the unstable check window
+        """
+        try:
+            return datetime.fromisoformat(timestamp).timestamp()
+        except (TypeError, ValueError):
+            return time.time()
+
     @staticmethod
     def should_track(event) -> bool:
         message = event.data.get("message")
         return "[WSTATION]" in message or "wstation:" in message
 
     @staticmethod
-    def get_track_key(event_data: dict):
-        message = event_data['message']
-        segments = message.split(" ")
-
+    def get_track_key(event_type: str | None, segments: list) -> str | None:
+        """ Client MAC of wireless client events, None for lines that are not tracked """
         # TODO: use scope
-        if "断开连接." in message:
-            return segments[1][:17]
-        elif "成功连接到AP" in message:
+        if event_type in TRACKED_EVENT_TYPES:
             return segments[1][:17]
-        elif "成功漫游到AP" in message:
-            return segments[1][:17],
-        else:
-            return ""
+
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "tracking_size": len(self.tracking_dict),
+            "tracking_lru_evictions": self.tracking_dict.lru_evictions,
+            "tracking_ttl_evictions": self.tracking_dict.ttl_evictions,
+            "unstable_window_size": len(self.unstable_window),
+            "page_size": self.page_size,
+            "catch_up_pages": self.pages_fetched,
+            "buffer_wraps": self.buffer_wraps,
+            "lost_events": self.lost_events,
+            **self.emitter.stats(),
+            **(self.listener.stats(self.source_ip) if self.listener is not None else {}),
+            **({"bus_unrouted": self.bus_router.unrouted} if self.bus_router is not None else {}),
+        }
+
+    def find_matcher(self, message: str) -> EventMatcher | None:
+        """ Substring checks in matcher order, faster than a combined regex on these lines """
+        for keyword, matcher in self.dispatch_table:
+            if keyword in message:
+                return matcher
+
+        return None
 
     @staticmethod
     def get_event_data(event) -> dict:
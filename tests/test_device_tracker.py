@@ -0,0 +1,71 @@
+"""DeviceTracker dispatch writes only the trackers of hosts that changed."""
+import asyncio
+from types import SimpleNamespace
+
+from custom_components.tplink_enterprise_router import device_tracker
+from custom_components.tplink_enterprise_router.host_diff import HostChangeSet, HostDiffEngine
+from custom_components.tplink_enterprise_router.host_record import HostRecord
+
+
+class FakeCoordinator:
+    def __init__(self, hosts_dict: dict):
+        self.status = {"hosts_dict": hosts_dict}
+        self.entry = SimpleNamespace(entry_id="test")
+        self.device_info = None
+        self.last_update_success = True
+        self.listeners = []
+
+    def async_add_listener(self, update_callback, context=None):
+        self.listeners.append(update_callback)
+        return lambda: self.listeners.remove(update_callback)
+
+
+def build_hosts(**ips) -> dict:
+    return {
+        mac: HostRecord({"mac": mac, "ip": ip, "hostname": mac, "type": "wireless", "ap_name": "AP1"})
+        for mac, ip in ips.items()
+    }
+
+
+def build_tracker(monkeypatch, coordinator: FakeCoordinator) -> device_tracker.DeviceTracker:
+    monkeypatch.setattr(device_tracker, "Store", lambda *args, **kwargs: None)
+    monkeypatch.setattr(
+        device_tracker.TPLinkTracker, "async_write_ha_state", lambda self: setattr(self, "writes", self.writes + 1)
+    )
+    monkeypatch.setattr(device_tracker.TPLinkTracker, "writes", 0, raising=False)
+
+    def add_entities(entities, update_before_add=False):
+        for entity in entities:
+            entity.hass = object()
+            asyncio.run(entity.async_added_to_hass())
+
+    tracker = device_tracker.DeviceTracker(None, coordinator.entry, coordinator, add_entities)
+    tracker.dispatch(HostChangeSet())
+
+    return tracker
+
+
+def test_tracker_does_not_listen_to_the_coordinator(monkeypatch):
+    coordinator = FakeCoordinator(build_hosts(aa="192.168.0.2"))
+    tracker = build_tracker(monkeypatch, coordinator)
+
+    tracker._add_entities(["aa"])
+
+    assert coordinator.listeners == []
+
+
+def test_untouched_mac_does_not_write(monkeypatch):
+    diff = HostDiffEngine()
+    coordinator = FakeCoordinator(build_hosts(aa="192.168.0.2", bb="192.168.0.3"))
+    diff.update(coordinator.status["hosts_dict"])
+    tracker = build_tracker(monkeypatch, coordinator)
+    tracker._add_entities(["aa", "bb"])
+
+    """ A coordinator update runs its listeners and the platform's dispatch """
+    coordinator.status["hosts_dict"] = build_hosts(aa="192.168.0.4", bb="192.168.0.3")
+    for listener in list(coordinator.listeners):
+        listener()
+    tracker.dispatch(diff.update(coordinator.status["hosts_dict"]))
+
+    assert tracker.tracked["aa"].writes == 1
+    assert tracker.tracked["bb"].writes == 0
@@ -0,0 +1,82 @@
+"""Cursor and page stitching of the polled router log."""
+from custom_components.tplink_enterprise_router.syslog_cursor import (
+    CURSOR_FOUND,
+    CURSOR_LOST,
+    CURSOR_NEED_MORE,
+    build_cursor,
+    find_new_lines,
+    join_pages,
+)
+
+
+def line(second: int, text: str = "same") -> str:
+    return f"<5>2024-01-01 00:00:{second:02d}[DHCPS]{text}"
+
+
+def buffer(*seconds_and_texts) -> list[str]:
+    """ Newest first, like read_logs """
+    return [line(second, text) for second, text in seconds_and_texts]
+
+
+def test_join_pages_keeps_identical_lines_at_a_page_boundary():
+    log = buffer(*[(9, "same")] * 6)
+
+    assert join_pages([log[:3], log[3:]], 3, [6, 6]) == log
+
+
+def test_join_pages_drops_lines_pushed_down_between_reads():
+    log = buffer((3, "d"), (2, "c"), (1, "b"), (0, "a"))
+    """ One line was logged before the second page was read """
+    grown = buffer((4, "e")) + log
+
+    assert join_pages([log[:2], grown[2:4]], 2, [4, 5]) == log[:3]
+
+
+def test_join_pages_without_totals_joins_by_position():
+    log = buffer((3, "d"), (2, "c"), (1, "b"), (0, "a"))
+
+    assert join_pages([log[:2], log[2:]], 2) == log
+
+
+def test_build_cursor_counts_identical_lines_of_the_newest_second():
+    cursor = build_cursor(buffer((5, "same"), (5, "same"), (5, "other"), (4, "same")))
+
+    assert cursor.timestamp == "2024-01-01 00:00:05"
+    assert cursor.ordinal == 3
+    assert build_cursor([]) is None
+
+
+def test_find_new_lines_with_repeated_identical_lines():
+    old = buffer((5, "same"), (5, "same"), (4, "x"))
+    cursor = build_cursor(old)
+    log = buffer((5, "same")) + old
+
+    assert find_new_lines(log, cursor, True) == (log[:1], CURSOR_FOUND)
+
+
+def test_find_new_lines_when_the_cursor_second_spans_pages():
+    old = buffer((5, "a"), (5, "b"), (4, "x"))
+    cursor = build_cursor(old)
+    log = buffer((6, "n"), (5, "c")) + old
+
+    """ The first page ends inside the cursor's second """
+    assert find_new_lines(log[:3], cursor, False) == (log[:1], CURSOR_NEED_MORE)
+    assert find_new_lines(log, cursor, True) == (log[:2], CURSOR_FOUND)
+
+
+def test_find_new_lines_at_the_page_limit_returns_only_newer_seconds():
+    cursor = build_cursor(buffer((5, "a"), (4, "x")))
+    log = buffer((7, "n"), (6, "m"), (5, "c"), (5, "b"))
+
+    """ Read so far never reaches below the cursor's second, only the newer seconds are known to be new """
+    new_lines, status = find_new_lines(log, cursor, False)
+
+    assert status == CURSOR_NEED_MORE
+    assert new_lines == log[:2]
+
+
+def test_find_new_lines_after_the_buffer_wrapped():
+    cursor = build_cursor(buffer((5, "a"), (4, "x")))
+    log = buffer((9, "n"), (8, "m"), (7, "l"))
+
+    assert find_new_lines(log, cursor, True) == (log, CURSOR_LOST)